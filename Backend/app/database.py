@@ -1,11 +1,255 @@
+import logging
+import os
+
+from sqlalchemy import event, inspect, insert, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from fastapi import Request, Response
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.utils import replica
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./healthbook.db")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+# optional read replica; with two SQLite files the replica is a copy of
+# the primary refreshed by app.utils.replica (a local stand-in)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# DATABASE_URL names the sync driver; request handlers reach the same
+# database through its async counterpart
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# connection pool (SQLite file databases get a QueuePool too)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    # readers no longer block on the writer (and vice versa)
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    # safe with WAL: only the last commits can be lost on power failure
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # wait for a competing writer instead of failing with "database is locked"
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # negative = KiB, so this is a 64 MiB page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cursor = dbapi_conn.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _make_query_only(dbapi_conn, _record) -> None:
+    # a write that slipped into a read session fails loudly
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def _engine_options(url: URL, echo: bool) -> dict:
+    options = {"echo": echo}
+    if url.get_backend_name() == "sqlite":
+        # pooled connections get handed to whichever thread needs one next
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # one shared in-memory database: pooling makes no sense here
+            return options
+    else:
+        # drop connections the server (or a proxy) closed while idle
+        options.update(pool_pre_ping=True, pool_recycle=DB_POOL_RECYCLE)
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def create_db_engine(url: str = DATABASE_URL, echo: bool = DB_ECHO) -> Engine:
+    """Build the engine for `url`; SQLite and Postgres share this code path."""
+    url = make_url(url)
+    new_engine = create_engine(url, **_engine_options(url, echo))
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+
+def create_async_db_engine(url: str = DATABASE_URL, echo: bool = DB_ECHO, read_only: bool = False) -> AsyncEngine:
+    """Same database and settings as create_db_engine, through an async driver."""
+    url = make_url(url)
+    url = url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+    new_engine = create_async_engine(url, **_engine_options(url, echo))
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        if read_only:
+            event.listen(new_engine.sync_engine, "connect", _make_query_only)
+    return new_engine
+
 
-DATABASE_URL = "sqlite:///./healthbook.db"
-engine = create_engine(DATABASE_URL, echo=True)
+def describe_engine(engine: Engine) -> dict:
+    """Effective configuration, read back from a live connection."""
+    pool = engine.pool
+    report = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "dialect": engine.dialect.name,
+        "driver": engine.dialect.driver,
+        "echo": engine.echo,
+        "pool": type(pool).__name__,
+    }
+    if isinstance(pool, QueuePool):
+        report["pool_size"] = pool.size()
+        report["max_overflow"] = pool._max_overflow
+        report["pool_timeout"] = pool._timeout
+
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            report["pragmas"] = {
+                name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in SQLITE_PRAGMAS
+            }
+        report["server_version"] = ".".join(map(str, engine.dialect.server_version_info or ()))
+    return report
+
+
+def insert_ignore(session: Session, model):
+    """INSERT that silently skips rows hitting a unique constraint."""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    return insert(model).prefix_with("OR IGNORE", dialect="sqlite")
+
+
+# startup, maintenance commands and worker threads
+engine = create_db_engine()
+# request handlers
+async_engine = create_async_db_engine()
+replica_engine = (
+    create_async_db_engine(DATABASE_REPLICA_URL, read_only=True) if DATABASE_REPLICA_URL else None
+)
+# True when the replica is a SQLite file that we copy ourselves
+REPLICA_IS_COPY = bool(
+    DATABASE_REPLICA_URL
+    and make_url(DATABASE_URL).get_backend_name() == "sqlite"
+    and make_url(DATABASE_REPLICA_URL).get_backend_name() == "sqlite"
+)
 
 def init_db():
     SQLModel.metadata.create_all(engine)
 
+def add_missing_columns(engine) -> list[str]:
+    """ALTER existing tables to add columns that models gained later.
+
+    create_all() never touches a table that already exists, so new columns
+    need a server default (or be nullable) to be added here.
+    Returns the "table.column" names that were added.
+    """
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'
+                if column.server_default is not None:
+                    ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def index_names(conn, table: str) -> set[str]:
+    """Names of the indexes on `table`, expression indexes included.
+
+    SQLite's reflection skips expression indexes (and so does
+    checkfirst=True), so there the catalog is read directly.
+    """
+    if conn.dialect.name == "sqlite":
+        return set(conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,)
+        ).scalars())
+    return {ix["name"] for ix in inspect(conn).get_indexes(table)}
+
+def add_missing_indexes(engine) -> list[str]:
+    """CREATE the model-declared indexes an existing table is missing.
+
+    A unique index that can't be built (duplicate rows) is reported and
+    skipped rather than blocking startup.
+    """
+    inspector = inspect(engine)
+    created = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        with engine.connect() as conn:
+            existing = index_names(conn, table.name)
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                with engine.begin() as conn:
+                    index.create(conn)
+                created.append(index.name)
+            except IntegrityError as e:
+                logger.warning("could not create index %s: %s", index.name, e.orig)
+    return created
+
 def get_session():
     with Session(engine) as session:
         yield session
+
+# objects stay loaded after commit: an expired attribute would need
+# implicit IO, which an AsyncSession can't do
+
+async def get_write_session(request: Request, response: Response):
+    """Primary database. Handlers that write (and get_current_user) use this."""
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        # this client's next reads go to the primary, so it sees its own write
+        replica.pin(request, response)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+async def open_read_session(request: Request) -> AsyncSession:
+    """Replica when there is a healthy one and the client hasn't just written.
+
+    The caller closes it; handlers get one through get_read_session, a
+    StreamingResponse body opens its own because it outlives the handler.
+    """
+    read_engine = async_engine
+    if replica_engine is not None and not replica.is_pinned(request) and replica.healthy(REPLICA_IS_COPY):
+        read_engine = replica_engine
+
+    session = AsyncSession(read_engine, expire_on_commit=False)
+    if read_engine is replica_engine:
+        try:
+            await session.connection()
+        except DBAPIError:
+            logger.warning("read replica unavailable, reading from the primary")
+            replica.mark_down()
+            await session.close()
+            session = AsyncSession(async_engine, expire_on_commit=False)
+    return session
+
+async def get_read_session(request: Request):
+    async with await open_read_session(request) as session:
+        yield session
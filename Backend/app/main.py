@@ -1,18 +1,40 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel
-from app.database import engine
+from fastapi.staticfiles import StaticFiles
+from sqlmodel import SQLModel, Session
+from app.database import engine, async_engine, replica_engine, add_missing_columns, add_missing_indexes, describe_engine
+from app.database import DATABASE_URL, DATABASE_REPLICA_URL, REPLICA_IS_COPY
 from app.routes import user_routes, auth_routes, protected_routes
 from app.routes import post_routes
 from app.models.like_model import Like
 from app.models.comment_model import Comment
-from app.routes import friend_routes
+from app.routes import friend_routes, follow_routes
 from app.routes import user_routes, auth_routes, protected_routes, friend_routes
 from app.routes.comment_like_routes import router as comment_like_routes
 from app.routes import workout_routes
+from app.routes import search_routes, export_routes
+from app.utils.counters import reconcile_counters
+from app.utils import media_storage, media_uploads
+from app.utils.search import ensure_search_index
+from app.utils.migrations import run_migrations
+from app.utils import token_store, replica, social_graph
+
+logger = logging.getLogger("uvicorn.error")
 
 app = FastAPI(title="HealthBook API", version="2.0.0")
 
+# --- upload size limits, enforced while the body streams in ---
+# (added before CORS so CORS wraps it and a 413 still carries its headers)
+app.add_middleware(
+    media_uploads.UploadSizeLimit,
+    limits={
+        "/posts/create": media_uploads.MEDIA_MAX_BYTES,
+        "/users/avatar": media_uploads.AVATAR_MAX_BYTES,
+    },
+)
+
 # --- CORS ---
 app.add_middleware(
     CORSMiddleware,
@@ -20,12 +42,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # read-your-writes pin the frontend echoes back (see utils/replica.py)
+    expose_headers=[replica.PIN_HEADER],
 )
 
 # --- DB init ---
 @app.on_event("startup")
 def on_startup():
+    logger.info("database: %s", describe_engine(engine))
+    logger.info("request handlers: %s (%s)", async_engine.url.render_as_string(hide_password=True), async_engine.pool.status())
+    if replica_engine is not None:
+        logger.info(
+            "read replica: %s (%s)", replica_engine.url.render_as_string(hide_password=True),
+            "local copy" if REPLICA_IS_COPY else "external",
+        )
     SQLModel.metadata.create_all(engine)
+    # older databases get the counter columns at 0 -> backfill them once
+    if add_missing_columns(engine):
+        with Session(engine) as session:
+            reconcile_counters(session)
+    with Session(engine) as session:
+        token_store.hash_legacy_tokens(session)
+    run_migrations(engine)
+    add_missing_indexes(engine)
+    ensure_search_index(engine)
+    with Session(engine) as session:
+        social_graph.load(session)
+    if REPLICA_IS_COPY:
+        replica.sync_sqlite(DATABASE_URL, DATABASE_REPLICA_URL)
+
+# --- background jobs ---
+@app.on_event("startup")
+async def start_background_jobs():
+    app.state.token_purge = asyncio.create_task(token_store.purge_periodically(engine))
+    app.state.graph_check = asyncio.create_task(social_graph.check_periodically(engine))
+    app.state.replica_sync = None
+    if REPLICA_IS_COPY:
+        app.state.replica_sync = asyncio.create_task(
+            replica.sync_periodically(DATABASE_URL, DATABASE_REPLICA_URL)
+        )
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    app.state.token_purge.cancel()
+    app.state.graph_check.cancel()
+    if app.state.replica_sync:
+        app.state.replica_sync.cancel()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 # --- Routes ---
 app.include_router(user_routes.router)
@@ -34,7 +99,14 @@ app.include_router(protected_routes.router)
 app.include_router(post_routes.router)
 app.include_router(comment_like_routes)
 app.include_router(friend_routes.router)
+app.include_router(follow_routes.router)
 app.include_router(workout_routes.router)
+app.include_router(search_routes.router)
+app.include_router(export_routes.router)
+
+# locally stored uploads (MEDIA_STORAGE=local)
+if isinstance(media_storage.storage, media_storage.LocalMediaStorage):
+    app.mount("/media", StaticFiles(directory=media_storage.storage.root), name="media")
 
 @app.get("/")
 def root():
@@ -1,8 +1,13 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 
 
 class CommentLike(SQLModel, table=True):
+    __table_args__ = (
+        Index("uq_commentlike_comment_user", "comment_id", "user_id", unique=True),
+        Index("ix_commentlike_user_comment", "user_id", "comment_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     comment_id: int = Field(foreign_key="comment.id")
     user_id: int = Field(foreign_key="user.id")
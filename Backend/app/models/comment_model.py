@@ -1,11 +1,18 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 
 class Comment(SQLModel, table=True):
+    __table_args__ = (
+        # comment pages: WHERE post_id = ? ORDER BY created_at, id
+        Index("ix_comment_post_created", "post_id", "created_at", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     post_id: int = Field(foreign_key="post.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # denormalized counter, kept in step by the comment-like routes
+    likes_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
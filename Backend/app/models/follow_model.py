@@ -1,8 +1,16 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 class Follow(SQLModel, table=True):
+    __table_args__ = (
+        # one follow per pair; also serves "who do I follow" for the following feed
+        Index("uq_follow_follower_following", "follower_id", "following_id", unique=True),
+        # keyset pages of followers / following, newest first
+        Index("ix_follow_following_created", "following_id", "created_at", "id"),
+        Index("ix_follow_follower_created", "follower_id", "created_at", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     follower_id: int = Field(foreign_key="user.id", index=True)
     following_id: int = Field(foreign_key="user.id", index=True)
@@ -1,9 +1,16 @@
 # backend/app/models/friendship_model.py
 from typing import Optional
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, case
 
 
 class Friendship(SQLModel, table=True):
+    __table_args__ = (
+        # friendships are looked up from either side, usually by status
+        Index("ix_friendship_requester_status", "requester_id", "status", "receiver_id"),
+        Index("ix_friendship_receiver_status", "receiver_id", "status", "requester_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # user who sent the request
@@ -15,3 +22,12 @@ class Friendship(SQLModel, table=True):
     # "pending" -> request sent, waiting
     # "accepted" -> both are friends
     status: str = Field(default="pending")
+
+
+# the pair's lower and higher user id, whichever of them sent the request
+_c = Friendship.__table__.c
+pair_low = case((_c.requester_id < _c.receiver_id, _c.requester_id), else_=_c.receiver_id)
+pair_high = case((_c.requester_id < _c.receiver_id, _c.receiver_id), else_=_c.requester_id)
+
+# one friendship per pair of users, in either direction
+Index("uq_friendship_pair", pair_low, pair_high, unique=True)
@@ -1,7 +1,14 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional
 
 class Like(SQLModel, table=True):
+    __table_args__ = (
+        # one like per user per post; also serves "likes of this post"
+        Index("uq_like_post_user", "post_id", "user_id", unique=True),
+        # "which of these posts did I like"
+        Index("ix_like_user_post", "user_id", "post_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     post_id: int = Field(foreign_key="post.id")
     user_id: int = Field(foreign_key="user.id")
@@ -0,0 +1,15 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class Media(SQLModel, table=True):
+    """One stored blob, keyed by the sha256 of its bytes."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    hash: str = Field(index=True, unique=True)
+    url: str
+    media_type: Optional[str] = None
+    size: int
+    # posts/avatars pointing at this blob; it is deleted when this hits 0
+    ref_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
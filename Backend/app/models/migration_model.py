@@ -0,0 +1,8 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class SchemaMigration(SQLModel, table=True):
+    """One applied step from app.utils.migrations.MIGRATIONS."""
+    name: str = Field(primary_key=True)
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
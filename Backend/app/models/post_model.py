@@ -1,14 +1,31 @@
 # backend/app/models/post_model.py
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 class Post(SQLModel, table=True):
+    __table_args__ = (
+        # global feed keyset: ORDER BY created_at DESC, id DESC
+        Index("ix_post_created", "created_at", "id"),
+        # a user's posts, same order
+        Index("ix_post_user_created", "user_id", "created_at", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str
     user_id: int = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     image_url: Optional[str] = None
     media_type: Optional[str] = None
+    # None (no media) | "processing" | "ready" | "failed"
+    media_status: Optional[str] = None
+    # sha256 of the media bytes -> Media row (reference counted)
+    media_hash: Optional[str] = Field(default=None, index=True)
+    # denormalized counters, kept in step by the like/comment routes
+    likes_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    comments_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # +1 on every write that changes how the post renders (likes, comments,
+    # media); the feed's ETag is built from the page's (id, version) pairs
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     # optional backref (user_model should define posts relationship)
     user: Optional["User"] = Relationship(back_populates="posts")
@@ -0,0 +1,20 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, UniqueConstraint
+from typing import Optional
+from datetime import datetime
+
+
+class TimelineEntry(SQLModel, table=True):
+    """One post id in one user's materialized friends timeline (inbox)."""
+    __table_args__ = (
+        UniqueConstraint("owner_id", "post_id"),
+        Index("ix_timeline_owner_created", "owner_id", "created_at", "post_id"),
+        Index("ix_timeline_owner_author", "owner_id", "author_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    owner_id: int = Field(foreign_key="user.id")
+    post_id: int = Field(foreign_key="post.id", index=True)
+    author_id: int = Field(foreign_key="user.id")
+    # copied from the post so the inbox can be range-scanned without a join
+    created_at: datetime
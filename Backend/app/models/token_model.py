@@ -1,11 +1,16 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, String
 from typing import Optional
 from datetime import datetime
 
 class RefreshToken(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id")
-    token: str
+    user_id: int = Field(foreign_key="user.id", index=True)
+    # sha256 hex digest of the refresh JWT; the raw token is never stored.
+    # The column keeps its original name so existing databases line up.
+    token_hash: str = Field(
+        sa_column=Column("token", String(64), unique=True, index=True, nullable=False)
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    expires_at: datetime
+    expires_at: datetime = Field(index=True)
     revoked: bool = Field(default=False)
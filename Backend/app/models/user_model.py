@@ -4,7 +4,7 @@ from sqlmodel import SQLModel, Field, Relationship
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str
-    email: str
+    email: str = Field(unique=True, index=True)
     password_hash: str
     gender: str
     height: float
@@ -13,7 +13,13 @@ class User(SQLModel, table=True):
     bmi: float
 
     avatar_url: Optional[str] = None  
+    avatar_hash: Optional[str] = None
     bio: Optional[str] = None
+    # accepted friendships, kept in step by friend_routes
+    friends_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # one-way follows, kept in step by follow_routes
+    followers_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    following_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     posts: List["Post"] = Relationship(
         back_populates="user",
         sa_relationship_kwargs={"cascade": "all, delete-orphan"}
@@ -0,0 +1,11 @@
+from sqlmodel import SQLModel, Field
+
+
+class ScopeVersion(SQLModel, table=True):
+    """Change counter per cacheable scope ("feed", "user:<id>").
+
+    Bumped by every write that changes what the scope's GET endpoints
+    return; read back to build ETags.
+    """
+    scope: str = Field(primary_key=True)
+    version: int = Field(default=0)
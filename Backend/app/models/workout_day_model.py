@@ -0,0 +1,27 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import UniqueConstraint
+from typing import Optional
+from datetime import date
+
+
+class WorkoutDay(SQLModel, table=True):
+    """Totals of one user's workouts for one exercise on one (server-local) day.
+
+    Kept in step with the workout table by utils/workout_rollup.
+    """
+    __table_args__ = (
+        # also serves "this user's days in a range"
+        UniqueConstraint("user_id", "day", "exercise", name="uq_workoutday_user_day_exercise"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    day: date
+    exercise: str
+    workouts: int = Field(default=0)
+    sets: int = Field(default=0)
+    # sets x reps
+    reps: int = Field(default=0)
+    # sets x reps x weight
+    volume: float = Field(default=0)
+    max_weight: Optional[float] = None
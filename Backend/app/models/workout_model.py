@@ -1,8 +1,12 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 class Workout(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_workout_user_created", "user_id", "created_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
 
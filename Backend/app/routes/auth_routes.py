@@ -1,17 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime
 
 from app.models.user_model import User
-from app.models.token_model import RefreshToken
-from app.database import get_session
+from app.database import get_write_session
+from app.utils import profile_cache, token_store
 from app.utils.auth_utils import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password,
     create_access_token,
     create_refresh_token,
-    decode_token
+    decode_token,
+    invalidate_principal,
 )
 
 router = APIRouter(tags=["Auth"])
@@ -35,8 +37,8 @@ class RefreshRequest(BaseModel):
 
 # --- Register ---
 @router.post("/register")
-def register_user(user_data: RegisterRequest, session: Session = Depends(get_session)):
-    existing = session.exec(select(User).where(User.email == user_data.email)).first()
+async def register_user(user_data: RegisterRequest, session: AsyncSession = Depends(get_write_session)):
+    existing = (await session.exec(select(User).where(User.email == user_data.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
 
@@ -44,7 +46,7 @@ def register_user(user_data: RegisterRequest, session: Session = Depends(get_ses
     user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         gender=user_data.gender,
         height=user_data.height,
         weight=user_data.weight,
@@ -52,32 +54,34 @@ def register_user(user_data: RegisterRequest, session: Session = Depends(get_ses
         bmi=bmi,
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
+    profile_cache.invalidate(user.id, user.email)
     return {"message": "User registered successfully!"}
 
 # --- Login ---
 @router.post("/login")
-def login_user(form_data: LoginRequest, session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.email == form_data.email)).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login_user(form_data: LoginRequest, session: AsyncSession = Depends(get_write_session)):
+    user = (await session.exec(select(User).where(User.email == form_data.email))).first()
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    valid, new_hash = await verify_and_update_password(form_data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # transparent rehash after a BCRYPT_ROUNDS change
+        user.password_hash = new_hash
+        session.add(user)
+
     access_token = create_access_token(subject=user.email)
     refresh_token = create_refresh_token(subject=user.email)
 
-    # store refresh token
+    # store refresh token (digest only)
     payload = decode_token(refresh_token)
     exp_ts = datetime.utcfromtimestamp(payload["exp"])
-    db_token = RefreshToken(
-        user_id=user.id,
-        token=refresh_token,
-        created_at=datetime.utcnow(),
-        expires_at=exp_ts,
-        revoked=False
-    )
-    session.add(db_token)
-    session.commit()
+    await session.run_sync(token_store.store, user.id, refresh_token, exp_ts)
+    await session.commit()
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -87,26 +91,34 @@ def login_user(form_data: LoginRequest, session: Session = Depends(get_session))
 
 # --- Refresh ---
 @router.post("/refresh")
-def refresh_token_endpoint(req: RefreshRequest, session: Session = Depends(get_session)):
+async def refresh_token_endpoint(req: RefreshRequest, session: AsyncSession = Depends(get_write_session)):
     payload = decode_token(req.refresh_token)
     email = payload.get("sub")
     if not email:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    db_token = session.exec(select(RefreshToken).where(RefreshToken.token == req.refresh_token)).first()
+    db_token = await session.run_sync(token_store.find, req.refresh_token)
     if not db_token or db_token.revoked or db_token.expires_at < datetime.utcnow():
         raise HTTPException(status_code=401, detail="Refresh token expired or revoked")
 
+    # rotate: the presented token is spent, a new one replaces it
     new_access = create_access_token(subject=email)
-    return {"access_token": new_access, "token_type": "bearer"}
+    new_refresh = create_refresh_token(subject=email)
+    exp_ts = datetime.utcfromtimestamp(decode_token(new_refresh)["exp"])
+    user_id = db_token.user_id
+    await session.delete(db_token)
+    await session.run_sync(token_store.store, user_id, new_refresh, exp_ts)
+    await session.commit()
+    return {"access_token": new_access, "token_type": "bearer", "refresh_token": new_refresh}
 
 # --- Logout ---
 @router.post("/logout")
-def logout(req: RefreshRequest, session: Session = Depends(get_session)):
-    db_token = session.exec(select(RefreshToken).where(RefreshToken.token == req.refresh_token)).first()
+async def logout(req: RefreshRequest, session: AsyncSession = Depends(get_write_session)):
+    db_token = await session.run_sync(token_store.find, req.refresh_token)
     if not db_token:
         return {"message": "Token already invalid or not found."}
     db_token.revoked = True
     session.add(db_token)
-    session.commit()
+    await session.commit()
+    invalidate_principal(db_token.user_id)
     return {"message": "Logout successful — refresh token revoked."}
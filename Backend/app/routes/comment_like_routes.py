@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import get_write_session, insert_ignore
 from app.utils.auth_utils import get_current_user
+from app.utils.counters import bump_counter
 from app.models.comment_model import Comment
 from app.models.comment_like_model import CommentLike
 from app.models.user_model import User
@@ -11,47 +13,38 @@ router = APIRouter(prefix="/comments", tags=["Comment Likes"])
 
 
 @router.post("/{comment_id}/like")
-def like_comment(
+async def like_comment(
     comment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
-    comment = session.get(Comment, comment_id)
+    comment = await session.get(Comment, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    existing = session.exec(
-        select(CommentLike).where(
-            CommentLike.comment_id == comment_id,
-            CommentLike.user_id == user.id,
-        )
-    ).first()
-
-    if existing:
-        raise HTTPException(status_code=400, detail="Already liked")
-
-    like = CommentLike(comment_id=comment_id, user_id=user.id)
-    session.add(like)
-    session.commit()
-    return {"message": "Comment liked!"}
+    # unique (comment_id, user_id): a repeat like inserts nothing
+    result = await session.exec(
+        insert_ignore(session, CommentLike).values(comment_id=comment_id, user_id=user.id)
+    )
+    if result.rowcount:
+        await session.run_sync(bump_counter, Comment, comment_id, "likes_count", 1)
+    await session.commit()
+    return {"message": "Comment liked!", "liked": True}
 
 
 @router.delete("/{comment_id}/like")
-def unlike_comment(
+async def unlike_comment(
     comment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
-    like = session.exec(
-        select(CommentLike).where(
+    result = await session.exec(
+        delete(CommentLike).where(
             CommentLike.comment_id == comment_id,
             CommentLike.user_id == user.id,
         )
-    ).first()
-
-    if not like:
-        raise HTTPException(status_code=404, detail="Like not found")
-
-    session.delete(like)
-    session.commit()
-    return {"message": "Comment like removed"}
+    )
+    if result.rowcount:
+        await session.run_sync(bump_counter, Comment, comment_id, "likes_count", -1)
+    await session.commit()
+    return {"message": "Comment like removed", "liked": False}
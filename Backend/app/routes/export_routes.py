@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+
+from app.database import open_read_session
+from app.models.comment_model import Comment
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.models.workout_model import Workout
+from app.utils.auth_utils import get_current_user
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+# rows fetched per round trip; also the size of each chunk written out
+EXPORT_CHUNK_ROWS = 1000
+
+_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _columns(kind: str):
+    if kind == "workouts":
+        return Workout, [Workout.id, Workout.exercise, Workout.sets, Workout.reps, Workout.weight, Workout.created_at]
+    if kind == "posts":
+        return Post, [
+            Post.id, Post.content, Post.image_url, Post.media_type,
+            Post.likes_count, Post.comments_count, Post.created_at,
+        ]
+    return Comment, [Comment.id, Comment.post_id, Comment.content, Comment.likes_count, Comment.created_at]
+
+
+def _statement(kind: str, user_id: int, from_: date | None, to: date | None):
+    """Oldest first, through each table's (user_id, created_at) index."""
+    model, columns = _columns(kind)
+    statement = (
+        select(*columns)
+        .where(model.user_id == user_id)
+        .order_by(model.created_at, model.id)
+        # stream in fixed-size partitions instead of buffering every row
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+    if from_:
+        statement = statement.where(model.created_at >= datetime.combine(from_, time()))
+    if to:
+        statement = statement.where(model.created_at < datetime.combine(to + timedelta(days=1), time()))
+    return statement
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _chunks(request: Request, kinds: list[str], fmt: str, user_id: int,
+                  from_: date | None, to: date | None) -> AsyncIterator[str]:
+    # the handler's session would be closed by the time the body is sent,
+    # so the stream opens (and closes) its own
+    session = await open_read_session(request)
+    async with session:
+        for kind in kinds:
+            result = await session.stream(_statement(kind, user_id, from_, to))
+            if fmt == "csv":
+                yield ",".join(result.keys()) + "\r\n"
+
+            async for partition in result.partitions():
+                out = io.StringIO()
+                if fmt == "csv":
+                    csv.writer(out).writerows([_plain(v) for v in row] for row in partition)
+                else:
+                    for row in partition:
+                        record = {k: _plain(v) for k, v in row._mapping.items()}
+                        if len(kinds) > 1:
+                            record["type"] = kind[:-1]
+                        out.write(json.dumps(record) + "\n")
+                yield out.getvalue()
+
+
+@router.get("/{kind}")
+async def export_history(
+    kind: Literal["workouts", "posts", "comments", "all"],
+    request: Request,
+    format: Literal["csv", "ndjson"] = "ndjson",
+    from_: date | None = Query(None, alias="from", description="First day (server time)"),
+    to: date | None = Query(None, description="Last day, inclusive"),
+    user: User = Depends(get_current_user),
+):
+    """Download the whole history, streamed: memory use doesn't grow with its size.
+
+    'all' is NDJSON only; every record carries a "type" of workout / post / comment.
+    """
+    if kind == "all" and format == "csv":
+        raise HTTPException(status_code=400, detail="'all' mixes record shapes; use format=ndjson")
+    kinds = ["workouts", "posts", "comments"] if kind == "all" else [kind]
+
+    return StreamingResponse(
+        _chunks(request, kinds, format, user.id, from_, to),
+        media_type=_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'},
+    )
@@ -0,0 +1,132 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete
+from sqlmodel import select, or_, and_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_read_session, get_write_session, insert_ignore
+from app.models.user_model import User
+from app.models.follow_model import Follow
+from app.utils.auth_utils import get_current_user
+from app.utils.counters import bump_counter
+from app.utils import etags, profile_cache, cursors
+
+# same prefix as friend_routes: FollowButton calls /friends/{id}/follow
+router = APIRouter(prefix="/friends", tags=["Follows"])
+
+FOLLOWS_PAGE_SIZE = 50
+FOLLOWS_MAX_PAGE_SIZE = 200
+
+
+async def _bump_follow_counts(session: AsyncSession, follower_id: int, following_id: int, delta: int) -> None:
+    await session.run_sync(bump_counter, User, follower_id, "following_count", delta)
+    await session.run_sync(bump_counter, User, following_id, "followers_count", delta)
+    await session.run_sync(etags.bump, etags.user_scope(follower_id), etags.user_scope(following_id))
+
+
+# ---------- FOLLOW ----------
+
+@router.post("/{user_id}/follow")
+async def follow_user(
+    user_id: int,
+    session: AsyncSession = Depends(get_write_session),
+    current_user: User = Depends(get_current_user),
+):
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="You cannot follow yourself")
+
+    if not await session.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # following twice is a no-op, not an error; counters move only on a real insert
+    result = await session.exec(
+        insert_ignore(session, Follow).values(follower_id=current_user.id, following_id=user_id)
+    )
+    if result.rowcount:
+        await _bump_follow_counts(session, current_user.id, user_id, 1)
+    await session.commit()
+    profile_cache.invalidate(current_user.id)
+    profile_cache.invalidate(user_id)
+
+    return {"message": "Following", "following": True}
+
+
+# ---------- UNFOLLOW ----------
+
+@router.delete("/{user_id}/unfollow")
+async def unfollow_user(
+    user_id: int,
+    session: AsyncSession = Depends(get_write_session),
+    current_user: User = Depends(get_current_user),
+):
+    result = await session.exec(
+        delete(Follow).where(Follow.follower_id == current_user.id, Follow.following_id == user_id)
+    )
+    if result.rowcount:
+        await _bump_follow_counts(session, current_user.id, user_id, -1)
+    await session.commit()
+    profile_cache.invalidate(current_user.id)
+    profile_cache.invalidate(user_id)
+
+    return {"message": "Unfollowed", "following": False}
+
+
+# ---------- FOLLOWERS / FOLLOWING ----------
+
+async def _follow_page(session: AsyncSession, user_id: int, incoming: bool, before: str | None, limit: int) -> dict:
+    """Newest follows first, keyset-paginated on (Follow.created_at, Follow.id)."""
+    owner_col, other_col = (
+        (Follow.following_id, Follow.follower_id) if incoming else (Follow.follower_id, Follow.following_id)
+    )
+    statement = (
+        select(Follow, User)
+        .join(User, User.id == other_col)
+        .where(owner_col == user_id)
+        .order_by(Follow.created_at.desc(), Follow.id.desc())
+    )
+    if before:
+        created_at, follow_id = cursors.decode(before)
+        statement = statement.where(
+            or_(
+                Follow.created_at < created_at,
+                and_(Follow.created_at == created_at, Follow.id < follow_id),
+            )
+        )
+
+    # fetch one extra row to know whether another page exists
+    results = (await session.exec(statement.limit(limit + 1))).all()
+    page = results[:limit]
+
+    return {
+        "users": [
+            {
+                "id": u.id,
+                "username": u.username,
+                "avatar_url": u.avatar_url,
+                "followed_at": f.created_at,
+            }
+            for (f, u) in page
+        ],
+        "next_cursor": cursors.encode(page[-1][0]) if len(results) > limit else None,
+    }
+
+
+@router.get("/{user_id}/followers")
+async def get_followers(
+    user_id: int,
+    before: str | None = Query(None, description="Cursor from a previous page: '<created_at>,<id>'"),
+    limit: int = Query(FOLLOWS_PAGE_SIZE, ge=1, le=FOLLOWS_MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+):
+    return await _follow_page(session, user_id, incoming=True, before=before, limit=limit)
+
+
+@router.get("/{user_id}/following")
+async def get_following(
+    user_id: int,
+    before: str | None = Query(None, description="Cursor from a previous page: '<created_at>,<id>'"),
+    limit: int = Query(FOLLOWS_PAGE_SIZE, ge=1, le=FOLLOWS_MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+):
+    return await _follow_page(session, user_id, incoming=False, before=before, limit=limit)
@@ -1,95 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, or_, not_
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, delete, update
+from sqlmodel import select, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import get_read_session, get_write_session, insert_ignore
 from app.models.user_model import User
-from app.models.friendship_model import Friendship
+from app.models.friendship_model import Friendship, pair_low, pair_high
 from app.utils.auth_utils import get_current_user
+from app.utils.counters import bump_counter
+from app.utils import timeline, etags, profile_cache, social_graph, suggestions
 
 router = APIRouter(prefix="/friends", tags=["Friends"])
 
+SUGGESTIONS_PAGE_SIZE = 20
 
-# ---------- HELPERS ----------
 
-def _friendship_exists(session: Session, user_id: int, other_id: int) -> Friendship | None:
-    """Return existing Friendship row between two users in any direction."""
-    return session.exec(
-        select(Friendship).where(
-            or_(
-                (Friendship.requester_id == user_id) & (Friendship.receiver_id == other_id),
-                (Friendship.requester_id == other_id) & (Friendship.receiver_id == user_id),
-            )
-        )
-    ).first()
+async def _between(session: AsyncSession, a: int, b: int) -> Friendship | None:
+    """The friendship row linking a and b, in either direction.
+
+    Filters on the same expressions as uq_friendship_pair, so it is a
+    single index lookup.
+    """
+    return (await session.exec(
+        select(Friendship).where(pair_low == min(a, b), pair_high == max(a, b))
+    )).first()
 
 
 # ---------- SUGGESTIONS ----------
 
 @router.get("/suggestions")
-def get_friend_suggestions(
-    session: Session = Depends(get_session),
+async def get_friend_suggestions(
+    limit: int = Query(SUGGESTIONS_PAGE_SIZE, ge=1, le=suggestions.SUGGESTIONS_MAX),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
-    my_links: List[Friendship] = session.exec(
-        select(Friendship).where(
-            or_(
-                Friendship.requester_id == current_user.id,
-                Friendship.receiver_id == current_user.id,
-            )
-        )
-    ).all()
-
-    excluded_ids = {current_user.id}
-    for f in my_links:
-        excluded_ids.add(f.requester_id)
-        excluded_ids.add(f.receiver_id)
-
-    suggestions = session.exec(
-        select(User).where(not_(User.id.in_(excluded_ids)))
-    ).all()
-
-    return [
-        {
-            "id": u.id,
-            "username": u.username,
-            "avatar_url": getattr(u, "avatar_url", None),
-            "bmi": getattr(u, "bmi", None),
-        }
-        for u in suggestions
-    ]
+    """Most mutual friends first; recently active / similar-BMI users fill the rest."""
+    ranked = await session.run_sync(suggestions.for_user, current_user)
+    return ranked[offset:offset + limit]
 
 
 # ---------- SEND FRIEND REQUEST (FOLLOW) ----------
 
 @router.post("/add/{target_id}")
-def send_friend_request(
+async def send_friend_request(
     target_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(get_current_user),
 ):
     if target_id == current_user.id:
         raise HTTPException(status_code=400, detail="You cannot add yourself")
 
-    target = session.get(User, target_id)
+    target = await session.get(User, target_id)
     if not target:
         raise HTTPException(status_code=404, detail="User not found")
 
-    existing = _friendship_exists(session, current_user.id, target_id)
+    # the table, not this worker's graph index, decides: another worker
+    # may have linked the pair since the index last caught up
+    existing = await _between(session, current_user.id, target_id)
     if existing:
         if existing.status == "accepted":
             raise HTTPException(status_code=400, detail="You are already friends")
         else:
             raise HTTPException(status_code=400, detail="Friend request already exists")
 
-    friendship = Friendship(
-        requester_id=current_user.id,
-        receiver_id=target_id,
-        status="pending",
+    # the pair index turns a concurrent duplicate into a skipped insert
+    result = await session.exec(
+        insert_ignore(session, Friendship).values(
+            requester_id=current_user.id,
+            receiver_id=target_id,
+            status="pending",
+        )
     )
-    session.add(friendship)
-    session.commit()
-    session.refresh(friendship)
+    if not result.rowcount:
+        raise HTTPException(status_code=400, detail="Friend request already exists")
+    await session.commit()
+    friendship = await _between(session, current_user.id, target_id)
+    social_graph.add_request(current_user.id, target_id)
+    suggestions.invalidate_around(current_user.id, target_id)
 
     return {"message": "Friend request sent", "friendship_id": friendship.id}
 
@@ -97,18 +85,18 @@ def send_friend_request(
 # ---------- INCOMING REQUESTS ----------
 
 @router.get("/requests")
-def get_incoming_requests(
-    session: Session = Depends(get_session),
+async def get_incoming_requests(
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
-    rows = session.exec(
+    rows = (await session.exec(
         select(Friendship, User)
         .join(User, User.id == Friendship.requester_id)
         .where(
             Friendship.receiver_id == current_user.id,
             Friendship.status == "pending",
         )
-    ).all()
+    )).all()
 
     return [
         {
@@ -124,58 +112,74 @@ def get_incoming_requests(
 # ---------- FRIEND LIST (ACCEPTED) ----------
 
 @router.get("/list")
-def get_friends(
-    session: Session = Depends(get_session),
+async def get_friends(
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ):
-    links: List[Friendship] = session.exec(
-        select(Friendship).where(
+    # read from the table: this worker's graph index may not have seen
+    # friendships accepted on another worker yet
+    friend_id = case(
+        (Friendship.requester_id == current_user.id, Friendship.receiver_id),
+        else_=Friendship.requester_id,
+    )
+    users = (await session.exec(
+        select(User)
+        .join(Friendship, User.id == friend_id)
+        .where(
             Friendship.status == "accepted",
-            or_(
-                Friendship.requester_id == current_user.id,
-                Friendship.receiver_id == current_user.id,
-            ),
-        )
-    ).all()
-
-    friends: list[dict] = []
-
-    for f in links:
-        friend_id = f.receiver_id if f.requester_id == current_user.id else f.requester_id
-        u = session.get(User, friend_id)
-        if not u:
-            continue
-        friends.append(
-            {
-                "id": u.id,
-                "username": u.username,
-                "avatar_url": getattr(u, "avatar_url", None),
-                "bmi": getattr(u, "bmi", None),
-            }
+            or_(Friendship.requester_id == current_user.id, Friendship.receiver_id == current_user.id),
         )
+        .order_by(User.id)
+    )).all()
 
-    return friends
+    return [
+        {
+            "id": u.id,
+            "username": u.username,
+            "avatar_url": getattr(u, "avatar_url", None),
+            "bmi": getattr(u, "bmi", None),
+        }
+        for u in users
+    ]
 
 
 # ---------- ACCEPT REQUEST ----------
 
 @router.post("/accept/{friendship_id}")
-def accept_request(
+async def accept_request(
     friendship_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(get_current_user),
 ):
-    f = session.get(Friendship, friendship_id)
+    f = await session.get(Friendship, friendship_id)
     if not f:
         raise HTTPException(status_code=404, detail="Request not found")
 
     if f.receiver_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    f.status = "accepted"
-    session.add(f)
-    session.commit()
-    session.refresh(f)
+    # only the request that flips pending -> accepted moves the counters;
+    # a repeated or concurrent accept matches no row
+    result = await session.exec(
+        update(Friendship)
+        .where(Friendship.id == friendship_id, Friendship.status == "pending")
+        .values(status="accepted")
+    )
+    if result.rowcount != 1:
+        raise HTTPException(status_code=409, detail="Request is no longer pending")
+
+    await session.run_sync(bump_counter, User, f.requester_id, "friends_count", 1)
+    await session.run_sync(bump_counter, User, f.receiver_id, "friends_count", 1)
+
+    requester = await session.get(User, f.requester_id)
+    await session.run_sync(timeline.backfill_inbox, current_user.id, requester)
+    await session.run_sync(timeline.backfill_inbox, requester.id, current_user)
+    await session.run_sync(etags.bump, etags.user_scope(f.requester_id), etags.user_scope(f.receiver_id))
+    await session.commit()
+    profile_cache.invalidate(f.requester_id)
+    profile_cache.invalidate(f.receiver_id)
+    social_graph.accept(f.requester_id, f.receiver_id)
+    suggestions.invalidate_around(f.requester_id, f.receiver_id)
 
     return {"message": "Friend request accepted"}
 
@@ -183,36 +187,62 @@ def accept_request(
 # ---------- REJECT REQUEST ----------
 
 @router.delete("/reject/{friendship_id}")
-def reject_request(
+async def reject_request(
     friendship_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(get_current_user),
 ):
-    f = session.get(Friendship, friendship_id)
+    f = await session.get(Friendship, friendship_id)
     if not f:
         raise HTTPException(status_code=404, detail="Request not found")
 
     if f.receiver_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    session.delete(f)
-    session.commit()
+    # an accepted friendship has counters, inboxes and ETags to undo, which
+    # is /remove's job; guarded in SQL so a concurrent accept can't slip by
+    result = await session.exec(
+        delete(Friendship).where(Friendship.id == friendship_id, Friendship.status == "pending")
+    )
+    if result.rowcount != 1:
+        raise HTTPException(status_code=409, detail="Already friends; use /friends/remove/{user_id}")
+    await session.commit()
+    social_graph.remove(f.requester_id, f.receiver_id)
+    suggestions.invalidate_around(f.requester_id, f.receiver_id)
     return {"message": "Friend request rejected"}
 
 
 # ✅ ✅ ✅ NEW: UNFRIEND / UNFOLLOW ROUTE (NO STRUCTURE CHANGE)
 @router.delete("/remove/{target_id}")
-def remove_friend(
+async def remove_friend(
     target_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(get_current_user),
 ):
-    f = _friendship_exists(session, current_user.id, target_id)
-
+    f = await _between(session, current_user.id, target_id)
     if not f:
         raise HTTPException(status_code=404, detail="Friendship not found")
 
-    session.delete(f)
-    session.commit()
+    # guarded on the status read above, so a concurrent remove (or accept)
+    # can't make the counters move twice or in the wrong direction
+    result = await session.exec(
+        delete(Friendship).where(Friendship.id == f.id, Friendship.status == f.status)
+    )
+    if result.rowcount != 1:
+        raise HTTPException(status_code=409, detail="Friendship changed, try again")
+
+    if f.status == "accepted":
+        await session.run_sync(bump_counter, User, f.requester_id, "friends_count", -1)
+        await session.run_sync(bump_counter, User, f.receiver_id, "friends_count", -1)
+        await session.run_sync(timeline.prune_inbox, current_user.id, target_id)
+        await session.run_sync(timeline.prune_inbox, target_id, current_user.id)
+        await session.run_sync(etags.bump, etags.user_scope(f.requester_id), etags.user_scope(f.receiver_id))
+
+    await session.commit()
+    profile_cache.invalidate(current_user.id)
+    profile_cache.invalidate(target_id)
+    social_graph.remove(current_user.id, target_id)
+    suggestions.invalidate_around(current_user.id, target_id)
 
     return {"message": "Friend removed"}
+
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlmodel import Session, select
-from typing import List
-import cloudinary
-import cloudinary.uploader
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from sqlalchemy import delete
+from sqlmodel import Session, select, or_, and_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal
+from functools import partial
 from pydantic import BaseModel
 
 from app.models.post_model import Post
@@ -10,19 +11,17 @@ from app.models.user_model import User
 from app.models.like_model import Like
 from app.models.comment_model import Comment
 from app.models.comment_like_model import CommentLike
-from app.database import get_session
+from app.models.follow_model import Follow
+from app.database import engine, get_read_session, get_write_session, insert_ignore
 from app.utils.auth_utils import get_current_user
-from app.utils.cloudinary_config import cloud_name, api_key, api_secret
+from app.utils.counters import bump_counter
+from app.utils import timeline, media_uploads, media_refs, etags, cursors
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
-# ✅ Cloudinary config
-cloudinary.config(
-    cloud_name=cloud_name,
-    api_key=api_key,
-    api_secret=api_secret,
-    secure=True
-)
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+COMMENTS_PAGE_SIZE = 50
 
 # ====== SCHEMAS ======
 class PostCreate(BaseModel):
@@ -32,198 +31,340 @@ class CommentCreate(BaseModel):
     content: str
 
 
+def _touch_post(session: Session, post_id: int) -> None:
+    """Invalidate feed / user-posts ETags after a write to one post."""
+    author_id = session.exec(select(Post.user_id).where(Post.id == post_id)).first()
+    if author_id is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    # the post's own row (likes/comments already update it), not a shared one
+    bump_counter(session, Post, post_id, "version", 1)
+    etags.bump(session, etags.user_scope(author_id))
+
+
 # ====== CREATE TEXT POST ======
 @router.post("/", response_model=Post)
-def create_post(
+async def create_post(
     post_data: PostCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user)
 ):
     post = Post(content=post_data.content, user_id=user.id)
     session.add(post)
-    session.commit()
-    session.refresh(post)
+    await session.flush()
+    await session.run_sync(timeline.fan_out_post, post, user)
+    await session.run_sync(etags.bump, etags.user_scope(user.id))
+    await session.commit()
+    await session.refresh(post)
     return post
 
 
 # ====== ✅ CREATE POST WITH IMAGE / GIF / VIDEO ======
+def _attach_post_media(post_id: int, spooled: media_uploads.SpooledFile, url: str, media_type: str | None) -> None:
+    """Runs on the upload pool once the file is stored."""
+    with Session(engine) as session:
+        post = session.get(Post, post_id)
+        if not post:
+            # deleted while uploading
+            media_refs.drop_if_unreferenced(session, spooled.digest, url, media_type)
+            return
+        media = media_refs.register(session, spooled.digest, url, media_type, spooled.size)
+        post.image_url = media.url
+        post.media_type = media.media_type   # ✅ REQUIRED FOR VIDEO SUPPORT
+        post.media_hash = media.hash
+        post.media_status = "ready"
+        session.add(post)
+        _touch_post(session, post.id)
+        session.commit()
+
+
+def _fail_post_media(post_id: int, error: Exception) -> None:
+    with Session(engine) as session:
+        post = session.get(Post, post_id)
+        if not post:
+            return
+        post.media_status = "failed"
+        session.add(post)
+        _touch_post(session, post.id)
+        session.commit()
+
+
 @router.post("/create", response_model=Post)
 async def create_post_with_media(
     content: str = Form(...),
     file: UploadFile | None = File(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
-    media_url = None
-    media_type = None
+    if not file:
+        return await create_post(PostCreate(content=content), session, user)
 
+    # the post is saved right away; the upload pool fills in the media later
+    media_uploads.reserve()
     try:
-        if file:
-            uploaded = cloudinary.uploader.upload(
-                file.file,
-                resource_type="auto"   # ✅ allows image + gif + video
-            )
-            media_url = uploaded.get("secure_url")
-            media_type = uploaded.get("resource_type")
-            if media_url and media_url.endswith(".gif"):
-                media_type = "gif"  # ✅ image | video
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading: {str(e)}")
-
-    post = Post(
-        content=content,
-        user_id=user.id,
-        image_url=media_url,
-        media_type=media_type,   # ✅ REQUIRED FOR VIDEO SUPPORT
+        spooled = await media_uploads.spool(file)
+
+        post = Post(content=content, user_id=user.id, media_status="processing")
+
+        # same bytes already stored -> reuse the url, skip the upload
+        media = await session.run_sync(media_refs.acquire, spooled.digest)
+        if media:
+            post.image_url = media.url
+            post.media_type = media.media_type
+            post.media_hash = media.hash
+            post.media_status = "ready"
+
+        session.add(post)
+        await session.flush()
+        await session.run_sync(timeline.fan_out_post, post, user)
+        await session.run_sync(etags.bump, etags.user_scope(user.id))
+        await session.commit()
+        await session.refresh(post)
+    except Exception:
+        media_uploads.release()
+        raise
+
+    if media:
+        media_uploads.discard(spooled)
+        media_uploads.release()
+        return post
+
+    media_uploads.submit(
+        spooled,
+        file.filename,
+        file.content_type,
+        on_done=partial(_attach_post_media, post.id, spooled),
+        on_error=partial(_fail_post_media, post.id),
     )
-
-    session.add(post)
-    session.commit()
-    session.refresh(post)
     return post
 
 
+# ====== FEED HELPERS ======
+def _post_rows_query():
+    """Post + author. Counts come from the denormalized Post columns."""
+    return (
+        select(Post, User)
+        .join(User, User.id == Post.user_id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+
+
+def _serialize_post(post: Post, u: User) -> dict:
+    return {
+        "id": post.id,
+        "content": post.content,
+        "user_id": post.user_id,
+        "user": u.username,
+        "username": u.username,
+        "avatar_url": u.avatar_url,
+        "image_url": post.image_url,
+        "media_type": post.media_type,   # ✅ frontend MUST receive this
+        "media_status": post.media_status,
+        "created_at": post.created_at,
+        "likes_count": post.likes_count,
+        "comments_count": post.comments_count,
+    }
+
+
+async def _liked_post_ids(session: AsyncSession, user_id: int, post_ids: list[int]) -> set[int]:
+    """Which of post_ids the user has liked, in one IN query."""
+    if not post_ids:
+        return set()
+    return set((await session.exec(
+        select(Like.post_id).where(Like.user_id == user_id, Like.post_id.in_(post_ids))
+    )).all())
+
+
+async def _serialize_posts(session: AsyncSession, rows, user: User, include_liked: bool) -> list[dict]:
+    posts = [_serialize_post(*row) for row in rows]
+    if include_liked:
+        liked = await _liked_post_ids(session, user.id, [p["id"] for p in posts])
+        for p in posts:
+            p["liked_by_me"] = p["id"] in liked
+    return posts
+
+
 # ====== FEED ======
 @router.get("/feed")
-def get_feed(
-    session: Session = Depends(get_session),
+async def get_feed(
+    request: Request,
+    response: Response,
+    before: str | None = Query(None, description="Cursor from a previous page: '<created_at>,<id>'"),
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    include_liked: bool = Query(False, description="Add liked_by_me to every post"),
+    mode: Literal["all", "following"] = Query("all", description="'following': only users I follow"),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(get_current_user)
 ):
-    results = session.exec(
-        select(Post, User).join(User, User.id == Post.user_id)
-        .order_by(Post.created_at.desc())
-    ).all()
-
-    feed = []
-    for post, u in results:
-        likes = session.exec(select(Like).where(Like.post_id == post.id)).all()
-        comments = session.exec(select(Comment).where(Comment.post_id == post.id)).all()
-
-        feed.append({
-            "id": post.id,
-            "content": post.content,
-            "user_id": post.user_id,
-            "user": u.username,
-            "username": u.username,
-            "avatar_url": u.avatar_url,
-            "image_url": post.image_url,
-            "media_type": post.media_type,   # ✅ frontend MUST receive this
-            "created_at": post.created_at,
-            "likes_count": len(likes),
-            "comments_count": len(comments)
-        })
-
-    return feed
+    following = mode == "following"
+    statement = _post_rows_query()
+    if following:
+        # one join: uq_follow_follower_following finds the followed ids,
+        # ix_post_user_created walks each author's posts newest first
+        statement = statement.join(Follow, Follow.following_id == Post.user_id).where(
+            Follow.follower_id == user.id
+        )
+
+    if before:
+        created_at, post_id = cursors.decode(before)
+        statement = statement.where(
+            or_(
+                Post.created_at < created_at,
+                and_(Post.created_at == created_at, Post.id < post_id),
+            )
+        )
+
+    # fetch one extra row to know whether another page exists
+    results = (await session.exec(statement.limit(limit + 1))).all()
+    page = results[:limit]
+
+    # everything a feed entry shows moves either the post's version or the
+    # author's name / avatar; a like by the viewer moves the version too
+    etag = etags.page_etag(
+        request,
+        [(p.id, p.version, u.username, u.avatar_url) for p, u in results],
+        viewer_id=user.id if include_liked or following else None,
+    )
+    if cached := etags.not_modified(request, response, etag):
+        return cached
+
+    next_cursor = None
+    if len(results) > limit:
+        next_cursor = cursors.encode(page[-1][0])
+
+    return {
+        "posts": await _serialize_posts(session, page, user, include_liked),
+        "next_cursor": next_cursor,
+    }
+
+
+# ====== FRIENDS TIMELINE ======
+@router.get("/timeline")
+async def get_timeline(
+    before: str | None = Query(None, description="Cursor from a previous page: '<created_at>,<id>'"),
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    include_liked: bool = Query(False, description="Add liked_by_me to every post"),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(get_current_user)
+):
+    results = await session.run_sync(
+        timeline.read_timeline, user.id, limit, cursors.decode(before) if before else None
+    )
+    page = results[:limit]
+
+    next_cursor = None
+    if len(results) > limit:
+        next_cursor = cursors.encode(page[-1][0])
+
+    return {
+        "posts": await _serialize_posts(session, page, user, include_liked),
+        "next_cursor": next_cursor,
+    }
 
 
 # ====== POSTS BY USER ======
 @router.get("/user/{user_id}")
-def get_user_posts(
+async def get_user_posts(
     user_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    include_liked: bool = Query(False, description="Add liked_by_me to every post"),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
-    results = session.exec(
-        select(Post, User)
-        .join(User, User.id == Post.user_id)
-        .where(Post.user_id == user_id)
-        .order_by(Post.created_at.desc())
-    ).all()
-
-    posts = []
-    for post, u in results:
-        likes = session.exec(select(Like).where(Like.post_id == post.id)).all()
-        comments = session.exec(select(Comment).where(Comment.post_id == post.id)).all()
-
-        posts.append({
-            "id": post.id,
-            "content": post.content,
-            "user_id": post.user_id,
-            "username": u.username,
-            "avatar_url": u.avatar_url,
-            "image_url": post.image_url,
-            "media_type": post.media_type,  
-            "created_at": post.created_at,
-            "likes_count": len(likes),
-            "comments_count": len(comments),
-        })
+    etag = await session.run_sync(
+        etags.make_etag, request, etags.user_scope(user_id),
+        viewer_id=current_user.id if include_liked else None,
+    )
+    if cached := etags.not_modified(request, response, etag):
+        return cached
 
-    return posts
+    results = (await session.exec(
+        _post_rows_query().where(Post.user_id == user_id)
+    )).all()
+
+    return await _serialize_posts(session, results, current_user, include_liked)
 
 
 # ====== DELETE POST ======
 @router.delete("/{post_id}")
-def delete_post(
+async def delete_post(
     post_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(get_current_user)
 ):
-    post = session.get(Post, post_id)
+    post = await session.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
     if post.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    session.delete(post)
-    session.commit()
+    await session.run_sync(timeline.remove_post, post.id)
+    await session.run_sync(_touch_post, post.id)
+    blob = await session.run_sync(media_refs.release, post.media_hash)
+    await session.delete(post)
+    await session.commit()
+    media_refs.delete_released(blob)
     return {"message": "Post deleted"}
 
 
 # ====== POST LIKE ======
+@router.get("/liked-by-me")
+async def liked_by_me_bulk(
+    ids: List[int] = Query(..., max_length=FEED_MAX_PAGE_SIZE, description="Post ids, e.g. ?ids=1&ids=2"),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(get_current_user)
+):
+    return {"liked": sorted(await _liked_post_ids(session, user.id, ids))}
+
+
 @router.get("/{post_id}/liked-by-me")
-def liked_by_me(
+async def liked_by_me(
     post_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(get_current_user)
 ):
-    like = session.exec(
+    like = (await session.exec(
         select(Like).where(Like.post_id == post_id, Like.user_id == user.id)
-    ).first()
+    )).first()
     return {"liked": like is not None}
 
 
 @router.post("/{post_id}/like")
-def like_post(
+async def like_post(
     post_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
-    exists = session.exec(
-        select(Like).where(Like.post_id == post_id, Like.user_id == user.id)
-    ).first()
-
-    if exists:
-        raise HTTPException(status_code=400, detail="Already liked")
-
-    like = Like(post_id=post_id, user_id=user.id)
-    session.add(like)
-    session.commit()
-    return {"message": "Post liked"}
+    await session.run_sync(_touch_post, post_id)
+    # the unique (post_id, user_id) index makes a repeat like a no-op
+    result = await session.exec(insert_ignore(session, Like).values(post_id=post_id, user_id=user.id))
+    if result.rowcount:
+        await session.run_sync(bump_counter, Post, post_id, "likes_count", 1)
+    await session.commit()
+    return {"message": "Post liked", "liked": True}
 
 
 @router.delete("/{post_id}/like")
-def unlike_post(
+async def unlike_post(
     post_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
-    exists = session.exec(
-        select(Like).where(Like.post_id == post_id, Like.user_id == user.id)
-    ).first()
-
-    if not exists:
-        raise HTTPException(status_code=404, detail="Like not found")
-
-    session.delete(exists)
-    session.commit()
-    return {"message": "Like removed"}
+    result = await session.exec(
+        delete(Like).where(Like.post_id == post_id, Like.user_id == user.id)
+    )
+    if result.rowcount:
+        await session.run_sync(bump_counter, Post, post_id, "likes_count", -1)
+        await session.run_sync(_touch_post, post_id)
+    await session.commit()
+    return {"message": "Like removed", "liked": False}
 
 @router.post("/{post_id}/comment")
-def add_comment(
+async def add_comment(
     post_id: int,
     comment_data: CommentCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
     comment = Comment(
@@ -231,56 +372,78 @@ def add_comment(
         user_id=user.id,
         post_id=post_id
     )
+    await session.run_sync(_touch_post, post_id)
     session.add(comment)
-    session.commit()
-    session.refresh(comment)
+    await session.run_sync(bump_counter, Post, post_id, "comments_count", 1)
+    await session.commit()
+    await session.refresh(comment)
     return comment
 
 
 @router.get("/{post_id}/comments")
-def get_comments(
+async def get_comments(
     post_id: int,
-    session: Session = Depends(get_session),
+    after: str | None = Query(None, description="Cursor from a previous page: '<created_at>,<id>'"),
+    limit: int = Query(COMMENTS_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(get_current_user),
 ):
-    comments = session.exec(
-        select(Comment)
+    statement = (
+        select(Comment, User)
+        .join(User, User.id == Comment.user_id)
         .where(Comment.post_id == post_id)
-        .order_by(Comment.created_at)
-    ).all()
-
-    result = []
-    for c in comments:
-        likes = session.exec(
-            select(CommentLike).where(CommentLike.comment_id == c.id)
-        ).all()
-
-        liked = session.exec(
-            select(CommentLike).where(
-                CommentLike.comment_id == c.id,
-                CommentLike.user_id == user.id
+        .order_by(Comment.created_at, Comment.id)
+    )
+
+    if after:
+        created_at, comment_id = cursors.decode(after)
+        statement = statement.where(
+            or_(
+                Comment.created_at > created_at,
+                and_(Comment.created_at == created_at, Comment.id > comment_id),
             )
-        ).first()
+        )
 
-        result.append({
-            "id": c.id,
-            "content": c.content,
-            "user_id": c.user_id,
-            "created_at": c.created_at,
-            "likes_count": len(likes),
-            "liked_by_me": liked is not None
-        })
+    results = (await session.exec(statement.limit(limit + 1))).all()
+    page = results[:limit]
 
-    return result
+    # one IN query for the caller's likes on this page
+    liked_ids = set((await session.exec(
+        select(CommentLike.comment_id).where(
+            CommentLike.user_id == user.id,
+            CommentLike.comment_id.in_([c.id for c, _ in page]),
+        )
+    )).all()) if page else set()
+
+    next_cursor = None
+    if len(results) > limit:
+        next_cursor = cursors.encode(page[-1][0])
+
+    return {
+        "comments": [
+            {
+                "id": c.id,
+                "content": c.content,
+                "user_id": c.user_id,
+                "username": u.username,
+                "avatar_url": u.avatar_url,
+                "created_at": c.created_at,
+                "likes_count": c.likes_count,
+                "liked_by_me": c.id in liked_ids,
+            }
+            for c, u in page
+        ],
+        "next_cursor": next_cursor,
+    }
 
 
 @router.delete("/comment/{comment_id}")
-def delete_comment(
+async def delete_comment(
     comment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user)
 ):
-    comment = session.get(Comment, comment_id)
+    comment = await session.get(Comment, comment_id)
 
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
@@ -288,50 +451,46 @@ def delete_comment(
     if comment.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    session.delete(comment)
-    session.commit()
+    await session.delete(comment)
+    await session.run_sync(bump_counter, Post, comment.post_id, "comments_count", -1)
+    await session.run_sync(_touch_post, comment.post_id)
+    await session.commit()
     return {"message": "Comment deleted"}
 
 
 # ====== COMMENT LIKE ======
 @router.post("/comments/{comment_id}/like")
-def like_comment(
+async def like_comment(
     comment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user)
 ):
-    exists = session.exec(
-        select(CommentLike).where(
-            CommentLike.comment_id == comment_id,
-            CommentLike.user_id == user.id
-        )
-    ).first()
-
-    if exists:
-        raise HTTPException(status_code=400, detail="Already liked")
+    comment = await session.get(Comment, comment_id)
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
 
-    like = CommentLike(comment_id=comment_id, user_id=user.id)
-    session.add(like)
-    session.commit()
-    return {"message": "Comment liked"}
+    result = await session.exec(
+        insert_ignore(session, CommentLike).values(comment_id=comment_id, user_id=user.id)
+    )
+    if result.rowcount:
+        await session.run_sync(bump_counter, Comment, comment_id, "likes_count", 1)
+    await session.commit()
+    return {"message": "Comment liked", "liked": True}
 
 
 @router.delete("/comments/{comment_id}/like")
-def unlike_comment(
+async def unlike_comment(
     comment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user)
 ):
-    exists = session.exec(
-        select(CommentLike).where(
+    result = await session.exec(
+        delete(CommentLike).where(
             CommentLike.comment_id == comment_id,
             CommentLike.user_id == user.id
         )
-    ).first()
-
-    if not exists:
-        raise HTTPException(status_code=404, detail="Like not found")
-
-    session.delete(exists)
-    session.commit()
-    return {"message": "Like removed"}
+    )
+    if result.rowcount:
+        await session.run_sync(bump_counter, Comment, comment_id, "likes_count", -1)
+    await session.commit()
+    return {"message": "Like removed", "liked": False}
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import DateTime, text
+from typing import Literal
+
+from app.database import engine, get_read_session
+from app.models.user_model import User
+from app.utils.auth_utils import get_current_user
+from app.utils.search import search_available, to_match_query, highlight_markers, render_highlight
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+_POSTS_SQL = text("""
+    SELECT p.id, p.user_id, u.username, u.avatar_url, p.image_url, p.media_type,
+           p.created_at, p.likes_count, p.comments_count,
+           snippet(post_fts, 0, :mark_open, :mark_close, '…', 24) AS highlight
+    FROM post_fts
+    JOIN post p ON p.id = post_fts.rowid
+    JOIN user u ON u.id = p.user_id
+    WHERE post_fts MATCH :q
+    ORDER BY bm25(post_fts), p.id DESC
+    LIMIT :limit OFFSET :offset
+""").columns(created_at=DateTime)
+
+_COMMENTS_SQL = text("""
+    SELECT c.id, c.post_id, c.user_id, u.username, u.avatar_url,
+           c.created_at, c.likes_count,
+           snippet(comment_fts, 0, :mark_open, :mark_close, '…', 24) AS highlight
+    FROM comment_fts
+    JOIN comment c ON c.id = comment_fts.rowid
+    JOIN user u ON u.id = c.user_id
+    WHERE comment_fts MATCH :q
+    ORDER BY bm25(comment_fts), c.id DESC
+    LIMIT :limit OFFSET :offset
+""").columns(created_at=DateTime)
+
+
+@router.get("/")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Literal["posts", "comments"] = "posts",
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(get_current_user),
+):
+    if not search_available(engine):
+        raise HTTPException(status_code=501, detail="Search is not available on this database")
+
+    match = to_match_query(q)
+    if not match:
+        return {"results": [], "next_offset": None}
+
+    statement = _POSTS_SQL if type == "posts" else _COMMENTS_SQL
+    mark_open, mark_close = highlight_markers()
+    rows = (await session.exec(
+        statement,
+        params={"q": match, "limit": limit + 1, "offset": offset, "mark_open": mark_open, "mark_close": mark_close},
+    )).mappings().all()
+
+    return {
+        "results": [
+            {**r, "highlight": render_highlight(r["highlight"], mark_open, mark_close)}
+            for r in rows[:limit]
+        ],
+        "next_offset": offset + limit if len(rows) > limit else None,
+    }
@@ -1,24 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Response
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
-import cloudinary
-import cloudinary.uploader
+import asyncio
+from functools import partial
 
 from app.models.user_model import User
-from app.database import get_session
-from app.utils.auth_utils import get_current_user
-from app.utils.cloudinary_config import cloud_name, api_key, api_secret
+from app.database import engine, get_write_session
+from app.utils.auth_utils import get_current_user, invalidate_principal, principal_cache
+from app.utils import media_uploads, media_refs, etags, profile_cache, replica
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-# Make sure Cloudinary is configured (safe to call multiple times)
-cloudinary.config(
-    cloud_name=cloud_name,
-    api_key=api_key,
-    api_secret=api_secret,
-    secure=True,
-)
-
 # ---------- SCHEMA FOR PROFILE UPDATE ----------
 class ProfileUpdate(BaseModel):
     username: str
@@ -30,55 +23,103 @@ class ProfileUpdate(BaseModel):
 
 # ---------- GET USER BY ID (FOR FRIEND PROFILE) ----------
 @router.get("/id/{user_id}")
-def get_user_by_id(user_id: int, session: Session = Depends(get_session)):
-    user = session.get(User, user_id)
-    if not user:
+async def get_user_by_id(
+    user_id: int,
+    request: Request,
+    response: Response,
+    # primary, not replica: a lagging replica would refill the profile
+    # cache with data that was just invalidated
+    session: AsyncSession = Depends(get_write_session),
+):
+    etag = await session.run_sync(etags.make_etag, request, etags.user_scope(user_id))
+    if cached := etags.not_modified(request, response, etag):
+        return cached
+
+    profile = await session.run_sync(profile_cache.get_profile, user_id)
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return profile
+
+
+# ---------- PROFILE / AUTH CACHE STATS ----------
+@router.get("/cache/stats")
+async def profile_cache_stats(current_user: User = Depends(get_current_user)):
+    return {**profile_cache.stats(), "principals": principal_cache.stats(), "replica": replica.stats()}
 
 
 # ---------- GET USER BY EMAIL (USED FOR LOGIN / ME) ----------
 @router.get("/{email}")
-def get_user(email: str, session: Session = Depends(get_session)):
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
-    if not user:
+async def get_user(email: str, session: AsyncSession = Depends(get_write_session)):
+    profile = await session.run_sync(profile_cache.get_profile_by_email, email)
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
-
-@router.get("/id/{user_id}")
-def get_user_by_id(user_id: int, session: Session = Depends(get_session)):
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return {**profile, "email": email}
 
 # ---------- UPDATE AVATAR ----------
+def _set_avatar(session: Session, user: User, media) -> None:
+    """Point the user at a Media row (already referenced), releasing the
+    previous avatar. Re-uploading the same image nets out to one reference."""
+    blob = media_refs.release(session, user.avatar_hash)
+    user.avatar_url = media.url
+    user.avatar_hash = media.hash
+    session.add(user)
+    etags.bump(session, etags.user_scope(user.id))
+    session.commit()
+    profile_cache.invalidate(user.id)
+    invalidate_principal(user.id)
+    media_refs.delete_released(blob)
+
+
+def _save_avatar(user_id: int, spooled: media_uploads.SpooledFile, url: str, media_type: str | None) -> None:
+    """Runs on the upload pool once the image is stored."""
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        media = media_refs.register(session, spooled.digest, url, media_type, spooled.size)
+        _set_avatar(session, user, media)
+
+
 @router.post("/avatar")
-def update_avatar(
+async def update_avatar(
     file: UploadFile = File(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(get_current_user),
 ):
+    media_uploads.reserve()
     try:
-        upload_result = cloudinary.uploader.upload(file.file)
-        url = upload_result.get("secure_url")
-
-        current_user.avatar_url = url
-        session.add(current_user)
-        session.commit()
-        session.refresh(current_user)
-
+        spooled = await media_uploads.spool(file, max_bytes=media_uploads.AVATAR_MAX_BYTES)
+    except Exception:
+        media_uploads.release()
+        raise
+
+    # same bytes already stored -> reuse the url, skip the upload
+    media = await session.run_sync(media_refs.acquire, spooled.digest)
+    if media:
+        media_uploads.discard(spooled)
+        media_uploads.release()
+        url = media.url
+        await session.run_sync(_set_avatar, current_user, media)
         return {"avatar_url": url}
+
+    future = media_uploads.submit(
+        spooled,
+        file.filename,
+        file.content_type,
+        on_done=partial(_save_avatar, current_user.id, spooled),
+    )
+    try:
+        # wait without holding the event loop or a request thread
+        url = await asyncio.wrap_future(future)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading image: {str(e)}")
 
+    return {"avatar_url": url}
+
 
 # ---------- UPDATE PROFILE FIELDS ----------
 @router.put("/update")
-def update_profile(
+async def update_profile(
     data: ProfileUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(get_current_user),
 ):
     current_user.username = data.username
@@ -93,7 +134,13 @@ def update_profile(
     )
 
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
-
-    return {"message": "Profile updated!", "user": current_user}
+    await session.run_sync(etags.bump, etags.user_scope(current_user.id))
+    await session.commit()
+    await session.refresh(current_user)
+    profile_cache.invalidate(current_user.id)
+    invalidate_principal(current_user.id)
+
+    return {
+        "message": "Profile updated!",
+        "user": {**profile_cache.public_profile(current_user), "email": current_user.email},
+    }
@@ -1,23 +1,37 @@
 # backend/app/routes/workout_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from typing import List
-from datetime import date
-
-from app.database import get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File
+from sqlmodel import select, or_, and_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.database import engine, get_read_session, get_write_session
 from app.models.workout_model import Workout
 from app.models.user_model import User
 from app.utils.auth_utils import get_current_user
+from app.utils import workout_stats, workout_rollup, workout_analytics, workout_import, replica, cursors
 
 router = APIRouter(prefix="/workouts", tags=["Workouts"])
 
+WORKOUTS_PAGE_SIZE = 50
+WORKOUTS_MAX_PAGE_SIZE = 200
+
+
+def _zone(tz: str | None) -> ZoneInfo | None:
+    try:
+        return ZoneInfo(tz) if tz else None
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="Unknown timezone")
+
 
 # ✅ ADD WORKOUT (FIXED DATE BUG)
 @router.post("/")
-def add_workout(
+async def add_workout(
     workout: Workout,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
     workout.user_id = user.id
@@ -26,34 +40,85 @@ def add_workout(
  
 
     session.add(workout)
-    session.commit()
-    session.refresh(workout)
+    await session.run_sync(workout_rollup.add, workout)
+    await session.commit()
+    await session.refresh(workout)
+    workout_analytics.invalidate(user.id)
     return workout
 
 
-# ✅ GET MY WORKOUTS
+# ✅ BULK IMPORT (CSV / NDJSON, streamed in batches)
+@router.post("/import")
+async def import_workouts(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    format: Literal["csv", "ndjson"] | None = Query(None, description="Default: from the file name / content type"),
+    user: User = Depends(get_current_user),
+):
+    """Columns / keys: exercise, sets, reps, weight (optional), created_at (optional ISO time)."""
+    fmt = format or workout_import.detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file, or pass ?format=")
+
+    # the import writes with the sync engine on a worker thread, not a request session
+    replica.pin(request, response)
+    result = await run_in_threadpool(workout_import.import_file, engine, user.id, file.file, fmt)
+    if result["imported"]:
+        workout_analytics.invalidate(user.id)
+    if result["aborted"] and not result["imported"]:
+        raise HTTPException(status_code=400, detail=result["aborted"])
+    return result
+
+
+# ✅ GET MY WORKOUTS (newest first, keyset pages)
 @router.get("/me")
-def get_my_workouts(
-    session: Session = Depends(get_session),
+async def get_my_workouts(
+    before: str | None = Query(None, description="Cursor from a previous page: '<created_at>,<id>'"),
+    limit: int = Query(WORKOUTS_PAGE_SIZE, ge=1, le=WORKOUTS_MAX_PAGE_SIZE),
+    from_: date | None = Query(None, alias="from", description="First day"),
+    to: date | None = Query(None, description="Last day, inclusive"),
+    tz: str | None = Query(None, description="IANA timezone the days are in (default: server time)"),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(get_current_user),
 ):
-    workouts = session.exec(
+    zone = _zone(tz)
+    statement = (
         select(Workout)
         .where(Workout.user_id == user.id)
-        .order_by(Workout.created_at.desc())
-    ).all()
-
-    return workouts
+        .order_by(Workout.created_at.desc(), Workout.id.desc())
+    )
+    if from_:
+        statement = statement.where(Workout.created_at >= workout_stats.day_start(from_, zone))
+    if to:
+        statement = statement.where(Workout.created_at < workout_stats.day_start(to + timedelta(days=1), zone))
+    if before:
+        created_at, workout_id = cursors.decode(before)
+        statement = statement.where(
+            or_(
+                Workout.created_at < created_at,
+                and_(Workout.created_at == created_at, Workout.id < workout_id),
+            )
+        )
+
+    # fetch one extra row to know whether another page exists
+    results = (await session.exec(statement.limit(limit + 1))).all()
+    page = results[:limit]
+
+    return {
+        "workouts": page,
+        "next_cursor": cursors.encode(page[-1]) if len(results) > limit else None,
+    }
 
 
 # ✅ DELETE WORKOUT
 @router.delete("/{workout_id}")
-def delete_workout(
+async def delete_workout(
     workout_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
     user: User = Depends(get_current_user),
 ):
-    workout = session.get(Workout, workout_id)
+    workout = await session.get(Workout, workout_id)
 
     if not workout:
         raise HTTPException(status_code=404, detail="Workout not found")
@@ -61,25 +126,60 @@ def delete_workout(
     if workout.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    session.delete(workout)
-    session.commit()
+    await session.delete(workout)
+    await session.flush()
+    day = workout.created_at.date()
+    await session.run_sync(workout_rollup.refresh, user.id, day, day)
+    await session.commit()
+    workout_analytics.invalidate(user.id)
     return {"message": "Workout deleted"}
 
 
-# ✅ CALENDAR DATA (🔵 + 🔥 SYSTEM NOW 100% CORRECT)
-@router.get("/calendar")
-def workout_calendar(
-    session: Session = Depends(get_session),
+# ✅ DAILY TOTALS PER EXERCISE (from the rollup, a few rows per day)
+@router.get("/summary")
+async def workout_summary(
+    from_: date | None = Query(None, alias="from", description="First day (default: 4 weeks before `to`)"),
+    to: date | None = Query(None, description="Last day, inclusive (default: today)"),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(get_current_user),
 ):
-    workouts = session.exec(
-        select(Workout).where(Workout.user_id == user.id)
-    ).all()
+    """Days are server-local, like the stored workout times."""
+    to = to or date.today()
+    from_ = from_ or to - timedelta(days=27)
+    if from_ > to:
+        raise HTTPException(status_code=400, detail="'from' is after 'to'")
 
-    date_map = {}
+    return await session.run_sync(workout_rollup.summary, user.id, from_, to)
 
-    for w in workouts:
-        day = w.created_at.strftime("%Y-%m-%d")  # ✅ FIXED
-        date_map[day] = date_map.get(day, 0) + 1
 
-    return date_map
+# ✅ CALENDAR DATA (🔵 + 🔥 SYSTEM NOW 100% CORRECT)
+@router.get("/calendar")
+async def workout_calendar(
+    from_: date | None = Query(None, alias="from", description="First day (default: 1st of the month of `to`)"),
+    to: date | None = Query(None, description="Last day, inclusive (default: today)"),
+    tz: str | None = Query(None, description="IANA timezone the days are in, e.g. 'Asia/Kolkata' (default: server time)"),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(get_current_user),
+):
+    """Per-day workouts / sets / reps / volume, grouped in SQL."""
+    zone = _zone(tz)
+    to = to or datetime.now(zone).date()
+    from_ = from_ or to.replace(day=1)
+    if from_ > to:
+        raise HTTPException(status_code=400, detail="'from' is after 'to'")
+    if (to - from_).days >= workout_stats.CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {workout_stats.CALENDAR_MAX_DAYS} days per request"
+        )
+
+    return await session.run_sync(workout_stats.calendar, user.id, from_, to, zone)
+
+
+# ✅ PROGRESSION ANALYTICS (estimated 1RM, weekly volume, rolling averages, PRs)
+@router.get("/analytics")
+async def workout_analytics_view(
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(get_current_user),
+):
+    """Computed over the whole history with NumPy; cached until the next workout change."""
+    return await session.run_sync(workout_analytics.for_user, user.id)
@@ -1,19 +1,42 @@
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
-from sqlmodel import Session, select
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.user_model import User
-from app.database import get_session
+from app.database import get_write_session
+from app.utils.cache import TTLCache
 
 # --- config ---
 SECRET_KEY = "super_secret_key_change_me"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+# hashes made with a different cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# hashes allowed to wait for a worker before logins get a 503
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 # --- password utils ---
@@ -23,6 +46,31 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# bcrypt is CPU-bound; it gets its own small pool so a burst of logins
+# can't take every AnyIO thread away from cheap requests like the feed
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+async def _run_hashing(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.wrap_future(_hash_executor.submit(fn, *args))
+    finally:
+        _hash_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """(matches, new hash or None). A new hash means the stored one used
+    an outdated cost factor and should be saved."""
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
 # --- token creation ---
 def create_access_token(subject: str, expires_delta: timedelta | None = None) -> str:
     to_encode = {"sub": subject}
@@ -31,7 +79,8 @@ def create_access_token(subject: str, expires_delta: timedelta | None = None) ->
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def create_refresh_token(subject: str, expires_delta: timedelta | None = None) -> str:
-    to_encode = {"sub": subject}
+    # jti keeps two tokens issued in the same second distinct
+    to_encode = {"sub": subject, "jti": uuid.uuid4().hex}
     expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
@@ -46,11 +95,38 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+# --- principal cache ---
+# sha256(access token) -> (generation, detached User snapshot)
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+# bumped to invalidate every cached token of a user at once
+_generations: dict[int, int] = {}
+
+def invalidate_principal(user_id: int) -> None:
+    """Forget cached principals for a user (profile change, logout)."""
+    _generations[user_id] = _generations.get(user_id, 0) + 1
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _cache_principal(token: str, user: User, exp: int) -> None:
+    snapshot = User(**user.model_dump())
+    make_transient_to_detached(snapshot)
+    ttl = min(PRINCIPAL_CACHE_TTL, exp - time.time())
+    if ttl > 0:
+        principal_cache.set(_token_key(token), (_generations.get(user.id, 0), snapshot), ttl=ttl)
+
 # --- get current user (for protected routes) ---
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_write_session)
 ) -> User:
+    # hot path: token seen recently -> no JWT decode, no query
+    entry = principal_cache.get(_token_key(token))
+    if entry is not None:
+        generation, snapshot = entry
+        if generation == _generations.get(snapshot.id, 0):
+            return await session.merge(snapshot, load=False)
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials.",
@@ -64,7 +140,8 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = session.exec(select(User).where(User.email == email)).first()
+    user = (await session.exec(select(User).where(User.email == email))).first()
     if user is None:
         raise credentials_exception
+    _cache_principal(token, user, payload["exp"])
     return user
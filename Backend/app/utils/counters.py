@@ -0,0 +1,100 @@
+from sqlalchemy import update
+from sqlmodel import Session, SQLModel, select, or_, func
+
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.models.friendship_model import Friendship
+from app.models.follow_model import Follow
+from app.models.comment_model import Comment
+from app.models.like_model import Like
+from app.models.comment_like_model import CommentLike
+
+
+def bump_counter(session: Session, model: type[SQLModel], row_id: int, column: str, delta: int) -> None:
+    """Atomically add `delta` to a counter column.
+
+    Runs as `UPDATE ... SET col = col + delta`, so it joins the caller's
+    transaction and never races with a read-modify-write in Python.
+    The caller commits.
+    """
+    col = getattr(model, column)
+    session.exec(
+        update(model)
+        .where(model.id == row_id)
+        .values({column: col + delta})
+    )
+
+
+def reconcile_counters(session: Session) -> dict:
+    """Recompute every denormalized counter from the source tables.
+
+    Only rows whose stored value drifted are rewritten. Returns how many
+    rows were fixed per table.
+    """
+    post_likes = (
+        select(func.count(Like.id))
+        .where(Like.post_id == Post.id)
+        .scalar_subquery()
+    )
+    post_comments = (
+        select(func.count(Comment.id))
+        .where(Comment.post_id == Post.id)
+        .scalar_subquery()
+    )
+    friends = (
+        select(func.count(Friendship.id))
+        .where(
+            Friendship.status == "accepted",
+            or_(Friendship.requester_id == User.id, Friendship.receiver_id == User.id),
+        )
+        .scalar_subquery()
+    )
+    followers = (
+        select(func.count(Follow.id))
+        .where(Follow.following_id == User.id)
+        .scalar_subquery()
+    )
+    following = (
+        select(func.count(Follow.id))
+        .where(Follow.follower_id == User.id)
+        .scalar_subquery()
+    )
+    comment_likes = (
+        select(func.count(CommentLike.id))
+        .where(CommentLike.comment_id == Comment.id)
+        .scalar_subquery()
+    )
+
+    posts = session.exec(
+        update(Post)
+        .where(or_(Post.likes_count != post_likes, Post.comments_count != post_comments))
+        .values(likes_count=post_likes, comments_count=post_comments)
+        .execution_options(synchronize_session=False)
+    )
+    comments = session.exec(
+        update(Comment)
+        .where(Comment.likes_count != comment_likes)
+        .values(likes_count=comment_likes)
+        .execution_options(synchronize_session=False)
+    )
+    users = session.exec(
+        update(User)
+        .where(or_(
+            User.friends_count != friends,
+            User.followers_count != followers,
+            User.following_count != following,
+        ))
+        .values(friends_count=friends, followers_count=followers, following_count=following)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+    return {"posts": posts.rowcount, "comments": comments.rowcount, "users": users.rowcount}
+
+
+if __name__ == "__main__":
+    # python -m app.utils.counters
+    from app.database import engine
+
+    with Session(engine) as session:
+        print(reconcile_counters(session))
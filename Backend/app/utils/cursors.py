@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def encode(row) -> str:
+    """Keyset cursor for any row with created_at and id: '<created_at iso>,<id>'."""
+    return f"{row.created_at.isoformat()},{row.id}"
+
+
+def decode(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, row_id = cursor.rsplit(",", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,68 @@
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.database import insert_ignore
+from app.models.version_model import ScopeVersion
+
+
+def user_scope(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def bump(session: Session, *scopes: str) -> None:
+    """Invalidate ETags for scopes; runs in the caller's transaction.
+
+    The seed row goes in with INSERT-or-ignore, so two first writes to a
+    scope can't both try to create it; the increment is then one UPDATE.
+    """
+    scopes = sorted(set(scopes))
+    session.connection().execute(
+        insert_ignore(session, ScopeVersion),
+        [{"scope": scope, "version": 0} for scope in scopes],
+    )
+    session.exec(
+        update(ScopeVersion)
+        .where(ScopeVersion.scope.in_(scopes))
+        .values(version=ScopeVersion.version + 1)
+    )
+
+
+def _weak_etag(stamp: str, request: Request, viewer_id: int | None) -> str:
+    stamp += f"|{request.url.path}?{request.url.query}|{viewer_id}"
+    return f'W/"{hashlib.sha1(stamp.encode()).hexdigest()}"'
+
+
+def make_etag(session: Session, request: Request, *scopes: str, viewer_id: int | None = None) -> str:
+    """Weak ETag from the scopes' versions plus the query string.
+
+    One primary-key lookup, no heavy query. Pass viewer_id when the
+    payload depends on who is asking (e.g. liked_by_me).
+    """
+    versions = dict(session.exec(
+        select(ScopeVersion.scope, ScopeVersion.version).where(ScopeVersion.scope.in_(scopes))
+    ).all())
+    stamp = "|".join(f"{s}={versions.get(s, 0)}" for s in sorted(scopes))
+    return _weak_etag(stamp, request, viewer_id)
+
+
+def page_etag(request: Request, parts, viewer_id: int | None = None) -> str:
+    """Weak ETag from values read along with the page itself (ids, row versions).
+
+    For lists that any write on the site can touch (the feed): no shared
+    counter row to update, and a change elsewhere leaves this page's tag alone.
+    """
+    stamp = ";".join(",".join(map(str, part)) for part in parts)
+    return _weak_etag(stamp, request, viewer_id)
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Set the ETag header; return a 304 if the client already has it."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -0,0 +1,58 @@
+from sqlmodel import Session, select
+
+from app.models.media_model import Media
+from app.utils.counters import bump_counter
+from app.utils import media_uploads
+
+
+def acquire(session: Session, digest: str) -> Media | None:
+    """Take a reference on an already stored blob, if there is one."""
+    media = session.exec(select(Media).where(Media.hash == digest)).first()
+    if media:
+        bump_counter(session, Media, media.id, "ref_count", 1)
+    return media
+
+
+def register(session: Session, digest: str, url: str, media_type: str | None, size: int) -> Media:
+    """Record a freshly stored blob with one reference.
+
+    If another upload of the same bytes finished first, that row is
+    reused instead (the storage key is the same hash, so is the blob).
+    """
+    media = acquire(session, digest)
+    if media:
+        return media
+    media = Media(hash=digest, url=url, media_type=media_type, size=size, ref_count=1)
+    session.add(media)
+    return media
+
+
+def release(session: Session, digest: str | None) -> tuple | None:
+    """Drop one reference. Returns the blob's (key, url, media_type) if
+    that was the last one.
+
+    The row is deleted in the caller's transaction; once that commits,
+    pass the result to delete_released() to remove the blob itself.
+    """
+    if not digest:
+        return None
+    media = session.exec(select(Media).where(Media.hash == digest)).first()
+    if not media:
+        return None
+    bump_counter(session, Media, media.id, "ref_count", -1)
+    session.refresh(media)
+    if media.ref_count > 0:
+        return None
+    session.delete(media)
+    return media.hash, media.url, media.media_type
+
+
+def drop_if_unreferenced(session: Session, digest: str, url: str, media_type: str | None) -> None:
+    """Remove a just-stored blob nobody ended up pointing at."""
+    if not session.exec(select(Media).where(Media.hash == digest)).first():
+        media_uploads.delete_blob(digest, url, media_type)
+
+
+def delete_released(blob: tuple | None) -> None:
+    if blob:
+        media_uploads.delete_blob(*blob)
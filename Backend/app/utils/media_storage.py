@@ -0,0 +1,97 @@
+import os
+import shutil
+from abc import ABC, abstractmethod
+
+import cloudinary
+import cloudinary.uploader
+
+from app.utils.cloudinary_config import cloud_name, api_key, api_secret
+
+# "cloudinary" (default) or "local" for offline development / tests
+MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "cloudinary")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "./media")
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "http://localhost:8000/media")
+
+
+def media_type_for(url: str | None, resource_type: str | None) -> str | None:
+    """image | gif | video, the values the frontend switches on."""
+    if url and url.lower().endswith(".gif"):
+        return "gif"
+    return resource_type
+
+
+class MediaStorage(ABC):
+    """Where uploaded post media and avatars end up.
+
+    Blobs are stored under `key` (the content hash), so the same bytes
+    always land in the same place. save() and delete() are blocking and
+    only ever called from the media upload pool.
+    """
+
+    @abstractmethod
+    def save(self, path: str, key: str, filename: str | None, content_type: str | None) -> tuple[str, str | None]:
+        """Store the file at `path`; return (public url, media type)."""
+
+    @abstractmethod
+    def delete(self, key: str, url: str, media_type: str | None) -> None:
+        """Remove the blob stored under `key`."""
+
+
+class CloudinaryStorage(MediaStorage):
+    def __init__(self):
+        cloudinary.config(
+            cloud_name=cloud_name,
+            api_key=api_key,
+            api_secret=api_secret,
+            secure=True,
+        )
+
+    def save(self, path, key, filename, content_type):
+        uploaded = cloudinary.uploader.upload(
+            path,
+            public_id=key,
+            overwrite=False,
+            resource_type="auto"   # ✅ allows image + gif + video
+        )
+        url = uploaded.get("secure_url")
+        return url, media_type_for(url, uploaded.get("resource_type"))
+
+    def delete(self, key, url, media_type):
+        resource_type = "video" if media_type == "video" else "image"
+        cloudinary.uploader.destroy(key, resource_type=resource_type)
+
+
+class LocalMediaStorage(MediaStorage):
+    """Copies files under MEDIA_ROOT; main.py serves them at /media."""
+
+    def __init__(self, root: str = MEDIA_ROOT, base_url: str = MEDIA_BASE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def save(self, path, key, filename, content_type):
+        ext = os.path.splitext(filename or "")[1].lower()
+        name = f"{key}{ext}"
+        target = os.path.join(self.root, name)
+        if not os.path.exists(target):
+            shutil.copyfile(path, target)
+
+        resource_type = (content_type or "").split("/")[0] or None
+        url = f"{self.base_url}/{name}"
+        return url, media_type_for(url, resource_type)
+
+    def delete(self, key, url, media_type):
+        name = url.rsplit("/", 1)[-1]
+        try:
+            os.remove(os.path.join(self.root, name))
+        except FileNotFoundError:
+            pass
+
+
+def _build_storage() -> MediaStorage:
+    if MEDIA_STORAGE == "local":
+        return LocalMediaStorage()
+    return CloudinaryStorage()
+
+
+storage: MediaStorage = _build_storage()
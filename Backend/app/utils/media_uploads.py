@@ -0,0 +1,170 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, NamedTuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import media_storage
+
+MEDIA_UPLOAD_WORKERS = int(os.getenv("MEDIA_UPLOAD_WORKERS", "4"))
+# uploads allowed to wait for a worker before new ones get a 503
+MEDIA_UPLOAD_QUEUE = int(os.getenv("MEDIA_UPLOAD_QUEUE", "32"))
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(50 * 1024 * 1024)))
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+# multipart boundaries, part headers and small form fields (a post's text)
+MULTIPART_OVERHEAD = 64 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=MEDIA_UPLOAD_WORKERS, thread_name_prefix="media-upload")
+_slots = threading.BoundedSemaphore(MEDIA_UPLOAD_WORKERS + MEDIA_UPLOAD_QUEUE)
+
+
+class SpooledFile(NamedTuple):
+    path: str
+    digest: str   # sha256 hex of the bytes, used as the storage key
+    size: int
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File is larger than {max_bytes} bytes")
+
+
+class UploadSizeLimit:
+    """ASGI middleware capping the request body of upload routes.
+
+    `limits` maps a path to its largest allowed file. Starlette parses a
+    multipart body into temp files before the handler runs, so the cap
+    has to sit here: a declared Content-Length over the limit is refused
+    before anything is read, and a chunked or understated body is cut off
+    at the first chunk that crosses it.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = max_bytes + MULTIPART_OVERHEAD
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > max_body:
+            response = JSONResponse({"detail": _too_large(max_bytes).detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def capped_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    # raised inside request.form(); FastAPI passes it on as the response
+                    raise _too_large(max_bytes)
+            return message
+
+        await self.app(scope, capped_receive, send)
+
+
+def reserve() -> None:
+    """Claim a pool slot or fail fast with 503. Pair with submit() or release()."""
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, try again shortly")
+
+
+def release() -> None:
+    _slots.release()
+
+
+async def spool(file: UploadFile, max_bytes: int = MEDIA_MAX_BYTES) -> SpooledFile:
+    """Copy the uploaded file to a temp file, hashing it chunk by chunk.
+
+    The UploadFile is closed once the response is sent, so the bytes have
+    to be moved out of it before handing off to the pool. By now the body
+    has already been received; UploadSizeLimit is what stops an oversized
+    one on the wire. The check here is the exact one on the file itself,
+    without the multipart framing allowance.
+    """
+    too_large = _too_large(max_bytes)
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    def _copy() -> SpooledFile:
+        hasher = hashlib.sha256()
+        size = 0
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(file.filename or "")[1])
+        try:
+            with os.fdopen(fd, "wb") as out:
+                file.file.seek(0)
+                while chunk := file.file.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise _TooLarge()
+                    hasher.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return SpooledFile(path, hasher.hexdigest(), size)
+
+    try:
+        return await run_in_threadpool(_copy)
+    except _TooLarge:
+        raise too_large
+
+
+def discard(spooled: SpooledFile) -> None:
+    """Drop a spooled file that turned out not to need uploading."""
+    os.unlink(spooled.path)
+
+
+def submit(
+    spooled: SpooledFile,
+    filename: str | None,
+    content_type: str | None,
+    on_done: Callable[[str, str | None], None],
+    on_error: Callable[[Exception], None] | None = None,
+) -> Future:
+    """Upload a spooled file on the pool, then call on_done(url, media_type).
+
+    Must follow a successful reserve(). The slot and temp file are freed
+    when the job finishes, whatever the outcome. The returned future
+    resolves to the url.
+    """
+    def _job() -> str:
+        try:
+            url, media_type = media_storage.storage.save(
+                spooled.path, spooled.digest, filename, content_type
+            )
+            on_done(url, media_type)
+            return url
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            raise
+        finally:
+            discard(spooled)
+            release()
+
+    return _executor.submit(_job)
+
+
+def delete_blob(key: str, url: str, media_type: str | None) -> Future:
+    """Remove a blob whose last reference went away (fire and forget)."""
+    return _executor.submit(media_storage.storage.delete, key, url, media_type)
@@ -0,0 +1,156 @@
+import logging
+from typing import Callable
+
+from sqlalchemy import delete, func, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
+
+from app.database import index_names
+from app.models.comment_like_model import CommentLike
+from app.models.comment_model import Comment
+from app.models.follow_model import Follow
+from app.models.friendship_model import Friendship, pair_low, pair_high
+from app.models.like_model import Like
+from app.models.migration_model import SchemaMigration
+from app.models.post_model import Post
+from app.models.workout_model import Workout
+from app.utils import timeline, workout_rollup
+from app.utils.counters import reconcile_counters
+
+logger = logging.getLogger(__name__)
+
+# create_all() only builds tables that don't exist yet. Anything an
+# existing database needs on top of that is a numbered step here; each
+# runs once, in order, in its own transaction, and is recorded in the
+# schemamigration table. Never edit a step that has shipped - add a new one.
+
+
+def _dedupe(session: Session, model: type[SQLModel], *columns) -> int:
+    """Keep the oldest row of each duplicate group."""
+    keep = select(func.min(model.id)).group_by(*columns)
+    result = session.exec(
+        delete(model)
+        .where(model.id.not_in(keep))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _create_indexes(session: Session, *models: type[SQLModel], only: set[str] | None = None) -> None:
+    """Build the models' declared indexes that don't exist yet (just `only`, if given).
+
+    A unique index that duplicate rows block is logged and skipped, as in
+    database.add_missing_indexes, instead of failing the whole step.
+    """
+    conn = session.connection()
+    for model in models:
+        existing = index_names(conn, model.__tablename__)
+        for index in model.__table__.indexes:
+            if index.name in existing or (only is not None and index.name not in only):
+                continue
+            try:
+                with conn.begin_nested():
+                    index.create(conn)
+            except IntegrityError as e:
+                logger.warning("could not create index %s: %s", index.name, e.orig)
+
+
+def dedupe_likes(session: Session) -> None:
+    """Double likes from the old check-then-insert race would block the unique indexes."""
+    removed = _dedupe(session, Like, Like.post_id, Like.user_id)
+    removed += _dedupe(session, CommentLike, CommentLike.comment_id, CommentLike.user_id)
+    if removed:
+        logger.info("removed %d duplicate likes", removed)
+        reconcile_counters(session)
+
+
+# what 0002 built when it shipped; indexes these models gained later
+# (uq_friendship_pair) come from their own steps, after any cleanup
+HOT_FOREIGN_KEY_INDEXES = {
+    "uq_like_post_user", "ix_like_user_post",
+    "uq_commentlike_comment_user", "ix_commentlike_user_comment",
+    "ix_comment_post_created", "ix_comment_user_id",
+    "ix_friendship_requester_status", "ix_friendship_receiver_status",
+    "ix_post_created", "ix_post_user_created", "ix_post_media_hash",
+    "ix_workout_user_created",
+}
+
+
+def hot_foreign_key_indexes(session: Session) -> None:
+    _create_indexes(
+        session, Like, CommentLike, Comment, Friendship, Post, Workout,
+        only=HOT_FOREIGN_KEY_INDEXES,
+    )
+
+
+def dedupe_follows(session: Session) -> None:
+    """Follow rows were never checked for duplicates; the unique index needs them gone."""
+    removed = _dedupe(session, Follow, Follow.follower_id, Follow.following_id)
+    if removed:
+        logger.info("removed %d duplicate follows", removed)
+        reconcile_counters(session)
+    _create_indexes(session, Follow)
+
+
+def fill_workout_rollup(session: Session) -> None:
+    logger.info("built %d workout rollup rows", workout_rollup.rebuild(session))
+
+
+def dedupe_friendships(session: Session) -> None:
+    """Requests were only checked against the per-process graph index, so a
+    pair can have several rows (either direction); the pair index needs one."""
+    accepted = select(pair_low, pair_high).where(Friendship.status == "accepted")
+    # a pending duplicate of an accepted friendship goes first...
+    removed = session.exec(
+        delete(Friendship)
+        .where(Friendship.status != "accepted", tuple_(pair_low, pair_high).in_(accepted))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    # ...then the oldest row of each pair stays
+    removed += _dedupe(session, Friendship, pair_low, pair_high)
+    if removed:
+        logger.info("removed %d duplicate friendships", removed)
+        reconcile_counters(session)
+    _create_indexes(session, Friendship)
+
+
+def fill_timelines(session: Session) -> None:
+    """Inboxes only fill on new posts and friendships; existing ones need a backfill."""
+    timeline.rebuild_timelines(session)
+
+
+MIGRATIONS: list[tuple[str, Callable[[Session], None]]] = [
+    ("0001_dedupe_likes", dedupe_likes),
+    ("0002_hot_foreign_key_indexes", hot_foreign_key_indexes),
+    ("0003_dedupe_follows", dedupe_follows),
+    ("0004_fill_workout_rollup", fill_workout_rollup),
+    ("0005_dedupe_friendships", dedupe_friendships),
+    ("0006_fill_timelines", fill_timelines),
+]
+
+
+def run_migrations(engine: Engine) -> list[str]:
+    """Apply every pending step; returns the names that ran."""
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+    with Session(engine) as session:
+        done = set(session.exec(select(SchemaMigration.name)).all())
+
+    applied = []
+    for name, step in MIGRATIONS:
+        if name in done:
+            continue
+        with Session(engine) as session:
+            step(session)
+            session.add(SchemaMigration(name=name))
+            session.commit()
+        logger.info("applied migration %s", name)
+        applied.append(name)
+    return applied
+
+
+if __name__ == "__main__":
+    # python -m app.utils.migrations
+    from app.database import engine
+
+    print(run_migrations(engine) or "up to date")
@@ -0,0 +1,75 @@
+import os
+
+from sqlmodel import Session, select
+
+from app.models.user_model import User
+from app.utils.cache import TTLCache
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "60"))
+
+# user id -> public profile dict
+profiles = TTLCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL)
+# email -> user id, so lookups by email share the profile entries
+emails = TTLCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL)
+
+
+def public_profile(user: User) -> dict:
+    """What profile endpoints expose: never password_hash or email."""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "avatar_url": user.avatar_url,
+        "bio": user.bio,
+        "gender": user.gender,
+        "height": user.height,
+        "weight": user.weight,
+        "age": user.age,
+        "bmi": user.bmi,
+        "friends_count": user.friends_count,
+        "followers_count": user.followers_count,
+        "following_count": user.following_count,
+    }
+
+
+def get_profile(session: Session, user_id: int) -> dict | None:
+    profile = profiles.get(user_id)
+    if profile is None:
+        user = session.get(User, user_id)
+        if not user:
+            return None
+        profile = public_profile(user)
+        profiles.set(user_id, profile)
+        emails.set(user.email, user_id)
+    return profile
+
+
+def get_profile_by_email(session: Session, email: str) -> dict | None:
+    user_id = emails.get(email)
+    if user_id is not None:
+        return get_profile(session, user_id)
+
+    user = session.exec(select(User).where(User.email == email)).first()
+    if not user:
+        return None
+    profile = public_profile(user)
+    profiles.set(user.id, profile)
+    emails.set(email, user.id)
+    return profile
+
+
+def invalidate(user_id: int | None = None, email: str | None = None) -> None:
+    """Call after the commit that changed the user."""
+    if user_id is not None:
+        profiles.pop(user_id)
+    if email is not None:
+        emails.pop(email)
+
+
+def clear() -> None:
+    profiles.clear()
+    emails.clear()
+
+
+def stats() -> dict:
+    return {"profiles": profiles.stats(), "emails": emails.stats()}
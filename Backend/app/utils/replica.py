@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import sqlite3
+import time
+
+from fastapi import Request, Response
+from sqlalchemy.engine import make_url
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# a client that just wrote reads from the primary for this long
+REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "10"))
+# a replica further behind than this is skipped
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "10"))
+# after a failed connection the replica is left alone this long
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+# SQLite stand-in only: how often the replica file is refreshed
+REPLICA_SYNC_INTERVAL = float(os.getenv("REPLICA_SYNC_INTERVAL", "2"))
+
+# signs the pin token handed to clients; must be the same in every worker
+REPLICA_PIN_SECRET = os.getenv("REPLICA_PIN_SECRET", "replica_pin_secret_change_me")
+
+# Read-your-writes pins live in two places. _pins is this process's own
+# memory, which covers every client but only this worker. The signed
+# PIN_HEADER token goes back to the client, which echoes it on its next
+# requests; any worker can verify it, and it survives a token refresh.
+PIN_HEADER = "X-Replica-Pin"
+
+# client key -> True while that client must read its own writes
+_pins = TTLCache(maxsize=100_000, ttl=REPLICA_PIN_SECONDS)
+# monotonic time of the last completed SQLite copy (None: never)
+_synced_at: float | None = None
+_down_until = 0.0
+
+
+def _client_key(request: Request) -> str:
+    """Per client: the bearer token if there is one, else the address."""
+    auth = request.headers.get("authorization")
+    if auth:
+        return hashlib.sha256(auth.encode()).hexdigest()
+    return request.client.host if request.client else ""
+
+
+def _sign(expires: int) -> str:
+    return hmac.new(REPLICA_PIN_SECRET.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+
+
+def _token_valid(token: str | None) -> bool:
+    expires, _, signature = (token or "").partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(int(expires)))
+
+
+def pin(request: Request, response: Response | None = None) -> None:
+    """Send this client's reads to the primary for REPLICA_PIN_SECONDS.
+
+    With a response, the pin also travels as a signed header so another
+    worker can honor it; without one it holds in this process only.
+    """
+    _pins.set(_client_key(request), True)
+    if response is not None:
+        expires = int(time.time() + REPLICA_PIN_SECONDS)
+        response.headers[PIN_HEADER] = f"{expires}.{_sign(expires)}"
+
+
+def is_pinned(request: Request) -> bool:
+    return _pins.get(_client_key(request), False) or _token_valid(request.headers.get(PIN_HEADER))
+
+
+def mark_down() -> None:
+    global _down_until
+    _down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+
+
+def healthy(synced_copy: bool) -> bool:
+    """Whether reads may use the replica. A SQLite copy must also be fresh."""
+    now = time.monotonic()
+    if now < _down_until:
+        return False
+    if synced_copy:
+        return _synced_at is not None and now - _synced_at <= REPLICA_MAX_LAG
+    return True
+
+
+def lag() -> float | None:
+    return None if _synced_at is None else round(time.monotonic() - _synced_at, 3)
+
+
+def sync_sqlite(primary_url: str, replica_url: str) -> None:
+    """Copy the primary SQLite file over the replica (online backup API).
+
+    Readers on the replica keep working; they see the new pages once
+    the copy is done, which is as close to streaming replication as one
+    file can get.
+    """
+    global _synced_at
+    started = time.monotonic()
+    src = sqlite3.connect(make_url(primary_url).database)
+    dst = sqlite3.connect(make_url(replica_url).database, timeout=30)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    # the copy reflects the primary as of when it started
+    _synced_at = started
+
+
+async def sync_periodically(primary_url: str, replica_url: str) -> None:
+    """Background task started by main.py; runs until cancelled."""
+    while True:
+        try:
+            await run_in_threadpool(sync_sqlite, primary_url, replica_url)
+        except Exception:
+            logger.exception("read replica sync failed")
+        await asyncio.sleep(REPLICA_SYNC_INTERVAL)
+
+
+def stats() -> dict:
+    return {
+        "lag": lag(),
+        "down": time.monotonic() < _down_until,
+        "pinned_clients": len(_pins),
+    }
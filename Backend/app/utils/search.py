@@ -0,0 +1,93 @@
+import html
+import re
+import secrets
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# External-content FTS5 tables: the text lives only in post/comment, the
+# index holds tokens keyed by rowid. Triggers keep them in sync on every
+# insert/update/delete, whichever code path did the write.
+FTS_TABLES = {
+    "post_fts": "post",
+    "comment_fts": "comment",
+}
+
+
+def _ddl(fts: str, table: str) -> list[str]:
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            content, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, content) VALUES (new.id, new.content);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, content) VALUES ('delete', old.id, old.content);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF content ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO {fts}(rowid, content) VALUES (new.id, new.content);
+        END""",
+    ]
+
+
+def search_available(engine: Engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Create the FTS tables and triggers; backfill them the first time."""
+    if not search_available(engine):
+        return
+    existing = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for fts, table in FTS_TABLES.items():
+            for statement in _ddl(fts, table):
+                conn.execute(text(statement))
+            if fts not in existing:
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def rebuild_search_index(engine: Engine) -> None:
+    """Re-tokenize every post and comment (after bulk imports, etc.)."""
+    ensure_search_index(engine)
+    with engine.begin() as conn:
+        for fts in FTS_TABLES:
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('optimize')"))
+
+
+def to_match_query(q: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted, so user input can't inject FTS operators.
+    """
+    words = re.findall(r"\w+", q, flags=re.UNICODE)
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def highlight_markers() -> tuple[str, str]:
+    """Match delimiters for snippet(), random per query so post text can't fake one."""
+    nonce = secrets.token_hex(8)
+    return f"\x02{nonce}\x02", f"\x03{nonce}\x03"
+
+
+def render_highlight(snippet: str | None, mark_open: str, mark_close: str) -> str | None:
+    """HTML-escape a snippet, then turn its match delimiters into <mark> tags.
+
+    snippet() returns the stored text verbatim, so the escaping has to
+    happen here; the <mark> tags are the only markup in the result.
+    """
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(mark_open, "<mark>").replace(mark_close, "</mark>")
+
+
+if __name__ == "__main__":
+    # python -m app.utils.search
+    from app.database import engine
+
+    rebuild_search_index(engine)
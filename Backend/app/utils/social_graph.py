@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.models.friendship_model import Friendship
+
+logger = logging.getLogger(__name__)
+
+# In-process friendship index behind friend suggestions, loaded at startup
+# (main.py) and kept in step by friend_routes after each commit. Every
+# worker holds its own copy and only sees its own writes, so each one also
+# re-checks it against the table every SOCIAL_GRAPH_CHECK_INTERVAL seconds.
+# Routes that must be exact (relationship checks, the friend list) read
+# the table instead.
+#
+#   _friends / _pending: user id -> sorted array of the other user ids
+#
+# Arrays keep the per-user lists compact (4 bytes per id).
+
+SOCIAL_GRAPH_CHECK_INTERVAL = int(os.getenv("SOCIAL_GRAPH_CHECK_INTERVAL", "300"))
+
+_friends: dict[int, array] = {}
+_pending: dict[int, array] = {}
+_lock = threading.Lock()
+
+_EMPTY = array("i")
+
+
+def _add(graph: dict[int, array], a: int, b: int) -> None:
+    for owner, other in ((a, b), (b, a)):
+        ids = graph.setdefault(owner, array("i"))
+        i = bisect_left(ids, other)
+        if i == len(ids) or ids[i] != other:
+            ids.insert(i, other)
+
+
+def _discard(graph: dict[int, array], a: int, b: int) -> None:
+    for owner, other in ((a, b), (b, a)):
+        ids = graph.get(owner)
+        if not ids:
+            continue
+        i = bisect_left(ids, other)
+        if i < len(ids) and ids[i] == other:
+            del ids[i]
+        if not ids:
+            del graph[owner]
+
+
+def _build(rows) -> tuple[dict, dict]:
+    friends: dict[int, list[int]] = {}
+    pending: dict[int, list[int]] = {}
+    for requester_id, receiver_id, status in rows:
+        target = friends if status == "accepted" else pending
+        target.setdefault(requester_id, []).append(receiver_id)
+        target.setdefault(receiver_id, []).append(requester_id)
+
+    def as_arrays(graph: dict[int, list[int]]) -> dict[int, array]:
+        return {u: array("i", sorted(set(ids))) for u, ids in graph.items()}
+
+    return as_arrays(friends), as_arrays(pending)
+
+
+def _pairs(graph: dict[int, array]) -> set[tuple[int, int]]:
+    return {(owner, other) for owner, ids in graph.items() for other in ids if owner < other}
+
+
+def _rows(session: Session):
+    return session.exec(
+        select(Friendship.requester_id, Friendship.receiver_id, Friendship.status)
+    ).all()
+
+
+def load(session: Session) -> int:
+    """(Re)build from the friendship table. Returns the number of rows."""
+    rows = _rows(session)
+    friends, pending = _build(rows)
+    global _friends, _pending
+    with _lock:
+        _friends, _pending = friends, pending
+    return len(rows)
+
+
+# ---------- mutations (call after the commit) ----------
+
+def add_request(requester_id: int, receiver_id: int) -> None:
+    with _lock:
+        _add(_pending, requester_id, receiver_id)
+
+
+def accept(requester_id: int, receiver_id: int) -> None:
+    with _lock:
+        _discard(_pending, requester_id, receiver_id)
+        _add(_friends, requester_id, receiver_id)
+
+
+def remove(a: int, b: int) -> None:
+    """Rejected request or unfriend."""
+    with _lock:
+        _discard(_friends, a, b)
+        _discard(_pending, a, b)
+
+
+# ---------- lookups ----------
+
+def friends_of(user_id: int) -> array:
+    """Sorted friend ids (a copy)."""
+    return array("i", _friends.get(user_id, _EMPTY))
+
+
+def linked(user_id: int) -> set[int]:
+    """The user, their friends and anyone with a pending request either way."""
+    return {user_id, *_friends.get(user_id, _EMPTY), *_pending.get(user_id, _EMPTY)}
+
+
+def mutual_counts(user_id: int) -> Counter:
+    """Friends-of-friends not yet linked to user_id -> shared friend count."""
+    counts: Counter = Counter()
+    with _lock:
+        for friend in _friends.get(user_id, _EMPTY):
+            counts.update(_friends.get(friend, _EMPTY))
+        for other in linked(user_id):
+            counts.pop(other, None)
+    return counts
+
+
+# ---------- introspection ----------
+
+def memory_bytes() -> int:
+    """Approximate size of the index (containers and arrays)."""
+    with _lock:
+        total = sys.getsizeof(_friends) + sys.getsizeof(_pending)
+        for graph in (_friends, _pending):
+            total += sum(sys.getsizeof(ids) for ids in graph.values())
+    return total
+
+
+def stats() -> dict:
+    return {
+        "users": len(_friends.keys() | _pending.keys()),
+        "friendships": sum(len(ids) for ids in _friends.values()) // 2,
+        "pending": sum(len(ids) for ids in _pending.values()) // 2,
+        "memory_bytes": memory_bytes(),
+    }
+
+
+def check(session: Session, repair: bool = False) -> dict:
+    """Compare the index with the friendship table.
+
+    Returns the (low id, high id, status) links missing from the index or
+    present only in it. With repair=True a drifted index is rebuilt from
+    the table.
+    """
+    rows = _rows(session)
+    friends, pending = _build(rows)
+    table = {(a, b, "accepted") for a, b in _pairs(friends)} | {(a, b, "pending") for a, b in _pairs(pending)}
+    with _lock:
+        index = {(a, b, "accepted") for a, b in _pairs(_friends)} | {(a, b, "pending") for a, b in _pairs(_pending)}
+
+    missing = sorted(table - index)
+    extra = sorted(index - table)
+    consistent = not (missing or extra)
+    if repair and not consistent:
+        load(session)
+    return {
+        "consistent": consistent,
+        "rows": len(rows),
+        "missing": missing,
+        "extra": extra,
+        "repaired": repair and not consistent,
+    }
+
+
+async def check_periodically(engine) -> None:
+    """Background task started by main.py; picks up friendship changes made
+    by other workers. Runs until cancelled."""
+    def _check() -> dict:
+        with Session(engine) as session:
+            return check(session, repair=True)
+
+    while True:
+        await asyncio.sleep(SOCIAL_GRAPH_CHECK_INTERVAL)
+        try:
+            result = await run_in_threadpool(_check)
+            if result["repaired"]:
+                logger.info(
+                    "social graph reloaded: %d links missing, %d stale",
+                    len(result["missing"]), len(result["extra"]),
+                )
+        except Exception:
+            logger.exception("social graph check failed")
+
+
+if __name__ == "__main__":
+    # python -m app.utils.social_graph [--check [--repair]]
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description="In-memory friendship index for this database")
+    parser.add_argument("--check", action="store_true", help="compare a loaded index with the friendship table")
+    parser.add_argument("--repair", action="store_true", help="with --check, reload the index if it drifted")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        load(session)
+        if args.check:
+            print(check(session, repair=args.repair))
+        print(stats())
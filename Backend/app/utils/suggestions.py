@@ -0,0 +1,109 @@
+import os
+
+from sqlalchemy import func
+from sqlmodel import Session, select, not_
+
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.utils import social_graph
+from app.utils.cache import TTLCache
+
+SUGGESTIONS_MAX = 100
+SUGGESTIONS_CACHE_TTL = float(os.getenv("SUGGESTIONS_CACHE_TTL", "300"))
+# fallback: authors of this many most recent posts are considered
+RECENT_POSTS_WINDOW = 500
+
+# user id -> ranked suggestion dicts (at most SUGGESTIONS_MAX)
+cache = TTLCache(maxsize=10000, ttl=SUGGESTIONS_CACHE_TTL)
+
+
+def bmi_band(bmi: float | None) -> int | None:
+    """WHO bands: underweight, normal, overweight, obese."""
+    if bmi is None:
+        return None
+    if bmi < 18.5:
+        return 0
+    if bmi < 25:
+        return 1
+    if bmi < 30:
+        return 2
+    return 3
+
+
+def _band_distance(a: float | None, b: float | None) -> int:
+    band_a, band_b = bmi_band(a), bmi_band(b)
+    if band_a is None or band_b is None:
+        return 4
+    return abs(band_a - band_b)
+
+
+def _fallback_ids(session: Session, user: User, exclude: set[int], needed: int) -> list[int]:
+    """Recently active users first, then the closest BMIs."""
+    recent = (
+        select(Post.user_id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(RECENT_POSTS_WINDOW)
+        .subquery()
+    )
+    ids = [
+        uid for uid in dict.fromkeys(session.exec(select(recent.c.user_id)).all())
+        if uid not in exclude
+    ][:needed]
+
+    if len(ids) < needed:
+        ids += session.exec(
+            select(User.id)
+            .where(not_(User.id.in_(exclude | set(ids))))
+            .order_by(func.abs(User.bmi - user.bmi), User.id)
+            .limit(needed - len(ids))
+        ).all()
+    return ids
+
+
+def _rank(session: Session, user: User) -> list[dict]:
+    mutual = social_graph.mutual_counts(user.id)
+    candidate_ids = [uid for uid, _ in mutual.most_common(SUGGESTIONS_MAX)]
+    if len(candidate_ids) < SUGGESTIONS_MAX:
+        exclude = social_graph.linked(user.id) | set(candidate_ids)
+        candidate_ids += _fallback_ids(session, user, exclude, SUGGESTIONS_MAX - len(candidate_ids))
+    if not candidate_ids:
+        return []
+
+    users = session.exec(select(User).where(User.id.in_(candidate_ids))).all()
+    # friends-of-friends: most shared friends, then the closest BMI band.
+    # The fallback tail keeps _fallback_ids' order (recent activity, then
+    # BMI); re-sorting it by band would throw the recency away.
+    position = {uid: i for i, uid in enumerate(candidate_ids)}
+    users.sort(key=lambda u: (
+        -mutual.get(u.id, 0),
+        _band_distance(user.bmi, u.bmi) if u.id in mutual else 0,
+        position[u.id],
+    ))
+    return [
+        {
+            "id": u.id,
+            "username": u.username,
+            "avatar_url": u.avatar_url,
+            "bmi": u.bmi,
+            "mutual_friends": mutual.get(u.id, 0),
+        }
+        for u in users
+    ]
+
+
+def for_user(session: Session, user: User) -> list[dict]:
+    ranked = cache.get(user.id)
+    if ranked is None:
+        ranked = _rank(session, user)
+        cache.set(user.id, ranked)
+    return ranked
+
+
+def invalidate_around(*user_ids: int) -> None:
+    """After a friendship change: the users themselves and their friends,
+    whose mutual counts just moved."""
+    affected = set(user_ids)
+    for user_id in user_ids:
+        affected.update(social_graph.friends_of(user_id))
+    for user_id in affected:
+        cache.pop(user_id)
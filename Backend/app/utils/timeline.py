@@ -0,0 +1,193 @@
+from datetime import datetime
+
+from sqlalchemy import delete, literal, case
+from sqlmodel import Session, select, or_, and_
+
+from app.database import insert_ignore
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.models.friendship_model import Friendship
+from app.models.timeline_model import TimelineEntry
+
+# authors with more friends than this are not fanned out on write;
+# their posts are pulled into readers' timelines at read time instead
+FANOUT_MAX_FRIENDS = 500
+
+# how many of a new friend's recent posts get copied into the inbox
+BACKFILL_POSTS = 50
+
+
+def _friend_id_column(user_id: int):
+    """The 'other side' of a Friendship row that involves user_id."""
+    return case(
+        (Friendship.requester_id == user_id, Friendship.receiver_id),
+        else_=Friendship.requester_id,
+    )
+
+
+def _accepted_friendships(user_id: int):
+    return and_(
+        Friendship.status == "accepted",
+        or_(Friendship.requester_id == user_id, Friendship.receiver_id == user_id),
+    )
+
+
+def fan_out_post(session: Session, post: Post, author: User) -> None:
+    """Push a new post into the author's inbox and every friend's inbox.
+
+    Friends are fanned out with a single INSERT ... SELECT. High-degree
+    authors only get their own inbox row; readers pick their posts up in
+    read_timeline(). The caller commits.
+    """
+    session.add(TimelineEntry(
+        owner_id=author.id,
+        post_id=post.id,
+        author_id=author.id,
+        created_at=post.created_at,
+    ))
+
+    if author.friends_count > FANOUT_MAX_FRIENDS:
+        return
+
+    friends = select(
+        _friend_id_column(author.id),
+        literal(post.id),
+        literal(author.id),
+        literal(post.created_at),
+    ).where(_accepted_friendships(author.id))
+
+    session.exec(
+        insert_ignore(session, TimelineEntry)
+        .from_select(["owner_id", "post_id", "author_id", "created_at"], friends)
+    )
+
+
+def backfill_inbox(session: Session, owner_id: int, author: User) -> None:
+    """Copy an author's recent posts into owner's inbox (new friendship)."""
+    if author.friends_count > FANOUT_MAX_FRIENDS:
+        return
+
+    recent = (
+        select(
+            literal(owner_id),
+            Post.id,
+            Post.user_id,
+            Post.created_at,
+        )
+        .where(Post.user_id == author.id)
+        .order_by(Post.created_at.desc())
+        .limit(BACKFILL_POSTS)
+    )
+    session.exec(
+        insert_ignore(session, TimelineEntry)
+        .from_select(["owner_id", "post_id", "author_id", "created_at"], recent)
+    )
+
+
+def prune_inbox(session: Session, owner_id: int, author_id: int) -> None:
+    """Drop an ex-friend's posts from owner's inbox."""
+    session.exec(
+        delete(TimelineEntry).where(
+            TimelineEntry.owner_id == owner_id,
+            TimelineEntry.author_id == author_id,
+        )
+    )
+
+
+def remove_post(session: Session, post_id: int) -> None:
+    session.exec(delete(TimelineEntry).where(TimelineEntry.post_id == post_id))
+
+
+def rebuild_timelines(session: Session) -> None:
+    """Refill every inbox from the post and friendship tables.
+
+    Idempotent (duplicates are skipped), so it can be re-run on a live database.
+    """
+    columns = ["owner_id", "post_id", "author_id", "created_at"]
+    own = select(Post.user_id, Post.id, Post.user_id, Post.created_at)
+    session.exec(
+        insert_ignore(session, TimelineEntry).from_select(columns, own)
+    )
+
+    for owner_col, author_col in (
+        (Friendship.receiver_id, Friendship.requester_id),
+        (Friendship.requester_id, Friendship.receiver_id),
+    ):
+        friends_posts = (
+            select(owner_col, Post.id, Post.user_id, Post.created_at)
+            .join(Post, Post.user_id == author_col)
+            .join(User, User.id == author_col)
+            .where(Friendship.status == "accepted", User.friends_count <= FANOUT_MAX_FRIENDS)
+        )
+        session.exec(
+            insert_ignore(session, TimelineEntry).from_select(columns, friends_posts)
+        )
+    session.commit()
+
+
+def read_timeline(
+    session: Session,
+    user_id: int,
+    limit: int,
+    before: tuple[datetime, int] | None = None,
+) -> list[tuple[Post, User]]:
+    """Newest-first page of (Post, author) for user_id's friends timeline.
+
+    One indexed range scan over the user's inbox, plus a pull of posts by
+    high-degree friends that were never fanned out. Returns up to
+    limit + 1 rows so the caller can tell whether another page exists.
+    """
+    inbox = (
+        select(Post, User)
+        .join(TimelineEntry, TimelineEntry.post_id == Post.id)
+        .join(User, User.id == Post.user_id)
+        .where(TimelineEntry.owner_id == user_id)
+        .order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())
+    )
+    if before:
+        created_at, post_id = before
+        inbox = inbox.where(
+            or_(
+                TimelineEntry.created_at < created_at,
+                and_(TimelineEntry.created_at == created_at, TimelineEntry.post_id < post_id),
+            )
+        )
+    rows = list(session.exec(inbox.limit(limit + 1)).all())
+
+    popular_friends = (
+        select(User.id)
+        .join(Friendship, User.id == _friend_id_column(user_id))
+        .where(_accepted_friendships(user_id), User.friends_count > FANOUT_MAX_FRIENDS)
+    )
+    pulled = (
+        select(Post, User)
+        .join(User, User.id == Post.user_id)
+        .where(Post.user_id.in_(popular_friends))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+    if before:
+        pulled = pulled.where(
+            or_(
+                Post.created_at < created_at,
+                and_(Post.created_at == created_at, Post.id < post_id),
+            )
+        )
+    rows += session.exec(pulled.limit(limit + 1)).all()
+
+    # merge both sources; an author who crossed the threshold may appear twice
+    seen = set()
+    merged = []
+    for post, u in sorted(rows, key=lambda r: (r[0].created_at, r[0].id), reverse=True):
+        if post.id in seen:
+            continue
+        seen.add(post.id)
+        merged.append((post, u))
+    return merged[:limit + 1]
+
+
+if __name__ == "__main__":
+    # python -m app.utils.timeline
+    from app.database import engine
+
+    with Session(engine) as session:
+        rebuild_timelines(session)
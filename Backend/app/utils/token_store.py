@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import delete, func, update
+from sqlmodel import Session, select, or_
+from starlette.concurrency import run_in_threadpool
+
+from app.models.token_model import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# live refresh tokens kept per user; older sessions are dropped on login
+MAX_REFRESH_TOKENS_PER_USER = int(os.getenv("MAX_REFRESH_TOKENS_PER_USER", "10"))
+REFRESH_TOKEN_PURGE_INTERVAL = int(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL", "3600"))
+REFRESH_TOKEN_PURGE_BATCH = 500
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def store(session: Session, user_id: int, token: str, expires_at: datetime) -> RefreshToken:
+    """Save a refresh token (as its digest) and cap the user's live rows.
+
+    The caller commits.
+    """
+    db_token = RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        created_at=datetime.utcnow(),
+        expires_at=expires_at,
+        revoked=False,
+    )
+    session.add(db_token)
+    session.flush()
+
+    keep = (
+        select(RefreshToken.id)
+        .where(RefreshToken.user_id == user_id)
+        .order_by(RefreshToken.created_at.desc(), RefreshToken.id.desc())
+        .limit(MAX_REFRESH_TOKENS_PER_USER)
+    )
+    session.exec(
+        delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.id.not_in(keep))
+        .execution_options(synchronize_session=False)
+    )
+    return db_token
+
+
+def find(session: Session, token: str) -> RefreshToken | None:
+    """Unique-index lookup by digest."""
+    return session.exec(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_token(token))
+    ).first()
+
+
+def purge_expired(session: Session, batch_size: int = REFRESH_TOKEN_PURGE_BATCH) -> int:
+    """Delete expired or revoked rows, one short transaction per batch.
+
+    Small batches keep each write lock brief, so logins and refreshes are
+    never stuck behind one big DELETE.
+    """
+    total = 0
+    while True:
+        batch = (
+            select(RefreshToken.id)
+            .where(or_(RefreshToken.expires_at < datetime.utcnow(), RefreshToken.revoked == True))  # noqa: E712
+            .limit(batch_size)
+        )
+        result = session.exec(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+def hash_legacy_tokens(session: Session, batch_size: int = REFRESH_TOKEN_PURGE_BATCH) -> int:
+    """One-off: replace raw JWTs stored by older versions with their digest."""
+    total = 0
+    while True:
+        rows = session.exec(
+            select(RefreshToken.id, RefreshToken.token_hash)
+            .where(func.length(RefreshToken.token_hash) != 64)
+            .limit(batch_size)
+        ).all()
+        for row_id, raw in rows:
+            session.exec(
+                update(RefreshToken)
+                .where(RefreshToken.id == row_id)
+                .values(token_hash=hash_token(raw))
+                .execution_options(synchronize_session=False)
+            )
+        session.commit()
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+
+
+async def purge_periodically(engine) -> None:
+    """Background task started by main.py; runs until cancelled."""
+    def _purge() -> int:
+        with Session(engine) as session:
+            return purge_expired(session)
+
+    while True:
+        try:
+            purged = await run_in_threadpool(_purge)
+            if purged:
+                logger.info("purged %d expired/revoked refresh tokens", purged)
+        except Exception:
+            logger.exception("refresh token purge failed")
+        await asyncio.sleep(REFRESH_TOKEN_PURGE_INTERVAL)
@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models.workout_model import Workout
+from app.utils.cache import TTLCache
+
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "600"))
+# rolling averages: weekly volume over this many weeks,
+# estimated 1RM over this many sessions of the same exercise
+ROLLING_WEEKS = 4
+ROLLING_SESSIONS = 5
+
+# user id -> analytics dict; dropped by invalidate() when workouts change
+cache = TTLCache(maxsize=10000, ttl=ANALYTICS_CACHE_TTL)
+
+# The history is pulled once into columnar arrays and every statistic is
+# a handful of whole-array operations (sort, reduceat, bincount, cumsum);
+# nothing below loops over workouts in Python.
+
+_EPOCH = np.datetime64(0, "D")
+
+
+def load_columns(session: Session, user_id: int) -> dict[str, np.ndarray] | None:
+    """A user's workouts as arrays, oldest first. Exercises become integer codes into `names`."""
+    # plain column tuples through the session's connection: no ORM row
+    # processing, and SQL truncates to the day so no datetime per row
+    rows = session.connection().execute(
+        select(Workout.exercise, Workout.sets, Workout.reps, Workout.weight, func.date(Workout.created_at))
+        .where(Workout.user_id == user_id)
+        .order_by(Workout.created_at, Workout.id)
+    ).all()
+    if not rows:
+        return None
+
+    exercise, sets, reps, weight, day = zip(*rows)
+    names, codes = np.unique(np.array(exercise, dtype=object), return_inverse=True)
+    return {
+        "names": names,
+        "exercise": codes,
+        "sets": np.array(sets, dtype=np.int64),
+        "reps": np.array(reps, dtype=np.int64),
+        # None -> NaN (bodyweight / unweighted sets)
+        "weight": np.array(weight, dtype=np.float64),
+        "day": np.array(day, dtype="datetime64[D]").astype(np.int64),
+    }
+
+
+def estimated_1rm(weight: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    """Epley: weight x (1 + reps / 30); a single is its own 1RM. NaN without a weight."""
+    return np.where(reps > 1, weight * (1 + reps / 30), weight)
+
+
+def _starts(*keys: np.ndarray) -> np.ndarray:
+    """Indexes where a run of equal keys begins (keys already sorted)."""
+    change = np.zeros(len(keys[0]), dtype=bool)
+    change[:1] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(change)
+
+
+def _as_dates(days: np.ndarray) -> list[str]:
+    return (_EPOCH + days).astype(str).tolist()
+
+
+def _sessions(cols: dict) -> dict[str, np.ndarray]:
+    """Best estimated 1RM per (exercise, day), ordered by exercise then day."""
+    e1rm = estimated_1rm(cols["weight"], cols["reps"])
+    valid = ~np.isnan(e1rm) & (cols["reps"] > 0) & (e1rm > 0)
+    ex, day, value = cols["exercise"][valid], cols["day"][valid], e1rm[valid]
+    if not len(value):
+        return {"exercise": ex, "day": day, "best": value, "rolling": value, "is_pr": valid[valid]}
+
+    order = np.lexsort((day, ex))
+    ex, day, value = ex[order], day[order], value[order]
+    starts = _starts(ex, day)
+    ex, day, best = ex[starts], day[starts], np.maximum.reduceat(value, starts)
+
+    # each exercise's first session, broadcast to all of its sessions
+    firsts = _starts(ex)
+    first_of = np.repeat(firsts, np.diff(np.append(firsts, len(ex))))
+    idx = np.arange(len(ex))
+
+    # rolling mean over the last ROLLING_SESSIONS sessions of the same exercise
+    lo = np.maximum(first_of, idx - ROLLING_SESSIONS + 1)
+    cumulative = np.concatenate(([0.0], np.cumsum(best)))
+    rolling = (cumulative[idx + 1] - cumulative[lo]) / (idx + 1 - lo)
+
+    # running record per exercise: offset each exercise above the previous
+    # one so a single maximum.accumulate never carries across exercises
+    offset = ex * (best.max() + 1)
+    record = np.maximum.accumulate(best + offset) - offset
+    previous = np.concatenate(([-np.inf], record[:-1]))
+    is_pr = (idx == first_of) | (best > previous)
+
+    return {"exercise": ex, "day": day, "best": best, "rolling": rolling, "is_pr": is_pr}
+
+
+def _best_per_exercise(ex: np.ndarray, value: np.ndarray, day: np.ndarray, n: int):
+    """Max value per exercise code and the first day it was reached (NaN / None if none)."""
+    best = np.full(n, np.nan)
+    best_day = np.full(n, -1, dtype=np.int64)
+    keep = ~np.isnan(value)
+    ex, value, day = ex[keep], value[keep], day[keep]
+    if len(value):
+        # last of each exercise = highest value, earliest day among ties
+        order = np.lexsort((-day, value, ex))
+        last = np.append(_starts(ex[order])[1:], len(order)) - 1
+        best[ex[order][last]] = value[order][last]
+        best_day[ex[order][last]] = day[order][last]
+    return best, best_day
+
+
+def weekly_volume(cols: dict) -> dict[str, list]:
+    """Sets x reps x weight per Monday-starting week, gaps filled with 0."""
+    volume = cols["sets"] * cols["reps"] * np.nan_to_num(cols["weight"])
+    day = cols["day"]
+    # 1970-01-01 was a Thursday
+    monday = day - (day + 3) % 7
+    first = monday.min()
+    totals = np.bincount((monday - first) // 7, weights=volume)
+    weeks = first + 7 * np.arange(len(totals))
+
+    window = np.convolve(totals, np.ones(ROLLING_WEEKS))[:len(totals)]
+    rolling = window / np.minimum(np.arange(1, len(totals) + 1), ROLLING_WEEKS)
+    return {
+        "week": _as_dates(weeks),
+        "volume": np.round(totals, 1).tolist(),
+        "rolling": np.round(rolling, 1).tolist(),
+    }
+
+
+def compute(cols: dict) -> dict:
+    names = cols["names"]
+    sessions = _sessions(cols)
+    best_weight, best_weight_day = _best_per_exercise(cols["exercise"], cols["weight"], cols["day"], len(names))
+    best_e1rm, best_e1rm_day = _best_per_exercise(sessions["exercise"], sessions["best"], sessions["day"], len(names))
+    pr_count = np.bincount(sessions["exercise"][sessions["is_pr"]], minlength=len(names))
+    session_count = np.bincount(cols["exercise"], minlength=len(names))
+
+    # split the per-session arrays into one series per exercise
+    bounds = np.searchsorted(sessions["exercise"], np.arange(len(names) + 1))
+    days = _as_dates(sessions["day"])
+    e1rm = np.round(sessions["best"], 1).tolist()
+    rolling = np.round(sessions["rolling"], 1).tolist()
+    is_pr = sessions["is_pr"].tolist()
+    best_weight_days = _as_dates(best_weight_day)
+    best_e1rm_days = _as_dates(best_e1rm_day)
+
+    exercises = []
+    for code, name in enumerate(names.tolist()):
+        lo, hi = bounds[code], bounds[code + 1]
+        has_weight = not np.isnan(best_weight[code])
+        has_e1rm = not np.isnan(best_e1rm[code])
+        exercises.append({
+            "exercise": name,
+            "workouts": int(session_count[code]),
+            "best_weight": float(best_weight[code]) if has_weight else None,
+            "best_weight_day": best_weight_days[code] if has_weight else None,
+            "best_e1rm": round(float(best_e1rm[code]), 1) if has_e1rm else None,
+            "best_e1rm_day": best_e1rm_days[code] if has_e1rm else None,
+            "pr_count": int(pr_count[code]),
+            # one entry per training day, columnar like weekly_volume
+            "e1rm": {
+                "day": days[lo:hi],
+                "e1rm": e1rm[lo:hi],
+                "rolling": rolling[lo:hi],
+                "pr": is_pr[lo:hi],
+            },
+        })
+
+    return {
+        "exercises": exercises,
+        "weekly_volume": weekly_volume(cols),
+        "rolling_weeks": ROLLING_WEEKS,
+        "rolling_sessions": ROLLING_SESSIONS,
+    }
+
+
+def for_user(session: Session, user_id: int) -> dict:
+    analytics = cache.get(user_id)
+    if analytics is None:
+        cols = load_columns(session, user_id)
+        analytics = compute(cols) if cols else {
+            "exercises": [],
+            "weekly_volume": {"week": [], "volume": [], "rolling": []},
+            "rolling_weeks": ROLLING_WEEKS,
+            "rolling_sessions": ROLLING_SESSIONS,
+        }
+        cache.set(user_id, analytics)
+    return analytics
+
+
+def invalidate(user_id: int) -> None:
+    """Call after the commit that added or removed the user's workouts."""
+    cache.pop(user_id)
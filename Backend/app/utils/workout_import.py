@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import BinaryIO, Iterator
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.models.workout_model import Workout
+from app.utils import workout_rollup
+
+# rows per INSERT (one executemany) and per transaction
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# per-row errors returned to the client; the rest are only counted
+IMPORT_MAX_ERRORS = 100
+MAX_EXERCISE_LENGTH = 100
+MAX_SETS_OR_REPS = 1000
+
+CSV_COLUMNS = ("exercise", "sets", "reps", "weight", "created_at")
+
+
+class ImportAborted(Exception):
+    """The file itself is unreadable (bad encoding, broken CSV quoting)."""
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".csv" or content_type == "text/csv":
+        return "csv"
+    if ext in (".ndjson", ".jsonl") or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def _rows(binary: BinaryIO, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """(line number, raw row, parse error) one at a time; the file is read in buffered chunks."""
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            missing = [c for c in ("exercise", "sets", "reps") if c not in (reader.fieldnames or [])]
+            if missing:
+                raise ImportAborted(f"CSV header must include {', '.join(missing)} (columns: {', '.join(CSV_COLUMNS)})")
+            for row in reader:
+                yield reader.line_num, row, None
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, None, f"invalid JSON: {e.msg}"
+                    continue
+                if not isinstance(row, dict):
+                    yield line_no, None, "expected a JSON object"
+                    continue
+                yield line_no, row, None
+    except UnicodeDecodeError:
+        raise ImportAborted("File is not valid UTF-8")
+    except csv.Error as e:
+        raise ImportAborted(f"Unreadable CSV: {e}")
+    finally:
+        # leave the upload's own file open; Starlette closes it
+        text.detach()
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _count(row: dict, field: str) -> int:
+    value = row.get(field)
+    if _blank(value):
+        raise ValueError(f"{field} is required")
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a whole number")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a whole number")
+    if isinstance(value, float) and value != number:
+        raise ValueError(f"{field} must be a whole number")
+    if not 1 <= number <= MAX_SETS_OR_REPS:
+        raise ValueError(f"{field} must be between 1 and {MAX_SETS_OR_REPS}")
+    return number
+
+
+def validate(row: dict, user_id: int, now: datetime) -> dict:
+    """One raw row -> insert parameters. Raises ValueError with a message for the client."""
+    exercise = row.get("exercise")
+    if not isinstance(exercise, str) or not exercise.strip():
+        raise ValueError("exercise is required")
+    exercise = exercise.strip()
+    if len(exercise) > MAX_EXERCISE_LENGTH:
+        raise ValueError(f"exercise is longer than {MAX_EXERCISE_LENGTH} characters")
+
+    weight = row.get("weight")
+    if _blank(weight):
+        weight = None
+    else:
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            raise ValueError("weight must be a number")
+        if not 0 <= weight < 10000:
+            raise ValueError("weight is out of range")
+
+    created_at = row.get("created_at")
+    if _blank(created_at):
+        created_at = now
+    else:
+        try:
+            created_at = datetime.fromisoformat(str(created_at).strip())
+        except ValueError:
+            raise ValueError("created_at must be an ISO date or datetime")
+        if created_at.tzinfo is not None:
+            # stored times are naive server-local, like datetime.now()
+            created_at = created_at.astimezone().replace(tzinfo=None)
+
+    return {
+        "user_id": user_id,
+        "exercise": exercise,
+        "sets": _count(row, "sets"),
+        "reps": _count(row, "reps"),
+        "weight": weight,
+        "created_at": created_at,
+    }
+
+
+def _write_batch(engine, user_id: int, batch: list[dict]) -> None:
+    """One executemany INSERT plus the matching rollup updates, in one transaction."""
+    totals: dict[tuple, dict] = {}
+    for w in batch:
+        reps = w["sets"] * w["reps"]
+        day = w["created_at"].date()
+        t = totals.setdefault((day, w["exercise"]), {
+            "user_id": user_id, "day": day, "exercise": w["exercise"],
+            "workouts": 0, "sets": 0, "reps": 0, "volume": 0.0, "max_weight": None,
+        })
+        t["workouts"] += 1
+        t["sets"] += w["sets"]
+        t["reps"] += reps
+        t["volume"] += reps * (w["weight"] or 0)
+        if w["weight"] is not None and (t["max_weight"] is None or w["weight"] > t["max_weight"]):
+            t["max_weight"] = w["weight"]
+
+    with Session(engine) as session:
+        session.connection().execute(insert(Workout), batch)
+        workout_rollup.add_many(session, list(totals.values()))
+        session.commit()
+
+
+def import_file(engine, user_id: int, binary: BinaryIO, fmt: str) -> dict:
+    """Stream-parse and insert a whole file. Runs on a worker thread.
+
+    Only the current batch is held in memory, so the file size doesn't
+    matter. Each batch commits on its own: rows before a fatal error stay
+    imported and are reported as such.
+    """
+    now = datetime.now()
+    imported = failed = batches = 0
+    errors: list[dict] = []
+    batch: list[dict] = []
+
+    def flush() -> None:
+        nonlocal imported, batches
+        if batch:
+            _write_batch(engine, user_id, batch)
+            imported += len(batch)
+            batches += 1
+            batch.clear()
+
+    def reject(line: int, message: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"line": line, "error": message})
+
+    aborted = None
+    binary.seek(0)
+    try:
+        for line, row, parse_error in _rows(binary, fmt):
+            if parse_error:
+                reject(line, parse_error)
+                continue
+            try:
+                batch.append(validate(row, user_id, now))
+            except ValueError as e:
+                reject(line, str(e))
+                continue
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+    except ImportAborted as e:
+        aborted = str(e)
+    flush()
+
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "batches": batches,
+        "aborted": aborted,
+    }
@@ -0,0 +1,186 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Float, bindparam, case, delete, func, insert, update
+from sqlmodel import Session, select, or_
+
+from app.database import insert_ignore
+from app.models.workout_model import Workout
+from app.models.workout_day_model import WorkoutDay
+
+# Daily totals per (user, day, exercise). add(), add_many() and refresh() run in the
+# caller's transaction, so the rollup never disagrees with a committed
+# workout; rebuild() regenerates it from the raw rows.
+
+
+def _day_window(first: date, last: date):
+    """created_at bounds of first..last (inclusive)."""
+    return (
+        Workout.created_at >= datetime.combine(first, time()),
+        Workout.created_at < datetime.combine(last + timedelta(days=1), time()),
+    )
+
+
+def _insert_grouped(session: Session, *where) -> int:
+    """INSERT ... SELECT the rollup rows for the workouts matching `where`."""
+    day = func.date(Workout.created_at)
+    reps = Workout.sets * Workout.reps
+    grouped = (
+        select(
+            Workout.user_id,
+            day,
+            Workout.exercise,
+            func.count(Workout.id),
+            func.sum(Workout.sets),
+            func.sum(reps),
+            func.sum(reps * func.coalesce(Workout.weight, 0)),
+            func.max(Workout.weight),
+        )
+        .where(*where)
+        .group_by(Workout.user_id, day, Workout.exercise)
+    )
+    result = session.exec(
+        insert(WorkoutDay).from_select(
+            ["user_id", "day", "exercise", "workouts", "sets", "reps", "volume", "max_weight"],
+            grouped,
+        )
+    )
+    return result.rowcount
+
+
+def add_many(session: Session, totals: list[dict]) -> None:
+    """Fold new workouts' totals into their (user, day, exercise) rows.
+
+    Each dict has user_id, day, exercise, workouts, sets, reps, volume and
+    max_weight (None if unweighted). Two executemany statements whatever
+    the number of rows: create missing rows, then add to them. The caller
+    commits.
+    """
+    if not totals:
+        return
+    conn = session.connection()
+    conn.execute(
+        insert_ignore(session, WorkoutDay),
+        [
+            {"user_id": t["user_id"], "day": t["day"], "exercise": t["exercise"],
+             "workouts": 0, "sets": 0, "reps": 0, "volume": 0}
+            for t in totals
+        ],
+    )
+
+    new_max = bindparam("add_max_weight", type_=Float)
+    conn.execute(
+        update(WorkoutDay)
+        .where(
+            WorkoutDay.user_id == bindparam("key_user_id"),
+            WorkoutDay.day == bindparam("key_day"),
+            WorkoutDay.exercise == bindparam("key_exercise"),
+        )
+        .values(
+            workouts=WorkoutDay.workouts + bindparam("add_workouts"),
+            sets=WorkoutDay.sets + bindparam("add_sets"),
+            reps=WorkoutDay.reps + bindparam("add_reps"),
+            volume=WorkoutDay.volume + bindparam("add_volume"),
+            # a NULL new_max leaves the stored max alone
+            max_weight=case(
+                (or_(WorkoutDay.max_weight.is_(None), WorkoutDay.max_weight < new_max), new_max),
+                else_=WorkoutDay.max_weight,
+            ),
+        ),
+        [
+            {"key_user_id": t["user_id"], "key_day": t["day"], "key_exercise": t["exercise"],
+             "add_workouts": t["workouts"], "add_sets": t["sets"], "add_reps": t["reps"],
+             "add_volume": t["volume"], "add_max_weight": t["max_weight"]}
+            for t in totals
+        ],
+    )
+
+
+def add(session: Session, workout: Workout) -> None:
+    """Fold one new workout into its day. The caller commits."""
+    reps = workout.sets * workout.reps
+    add_many(session, [{
+        "user_id": workout.user_id,
+        "day": workout.created_at.date(),
+        "exercise": workout.exercise,
+        "workouts": 1,
+        "sets": workout.sets,
+        "reps": reps,
+        "volume": reps * (workout.weight or 0),
+        "max_weight": workout.weight,
+    }])
+
+
+def refresh(session: Session, user_id: int, first: date, last: date) -> None:
+    """Recompute a user's days first..last from the workout table.
+
+    Used after deletes, where a max weight can't simply be subtracted.
+    The caller commits.
+    """
+    session.exec(
+        delete(WorkoutDay).where(
+            WorkoutDay.user_id == user_id, WorkoutDay.day >= first, WorkoutDay.day <= last
+        )
+    )
+    _insert_grouped(session, Workout.user_id == user_id, *_day_window(first, last))
+
+
+def rebuild(session: Session, user_id: int | None = None) -> int:
+    """Regenerate the rollup (everyone's, or one user's). Returns the row count."""
+    if user_id is None:
+        session.exec(delete(WorkoutDay))
+        rows = _insert_grouped(session)
+    else:
+        session.exec(delete(WorkoutDay).where(WorkoutDay.user_id == user_id))
+        rows = _insert_grouped(session, Workout.user_id == user_id)
+    session.commit()
+    return rows
+
+
+# ---------- reads ----------
+
+def days(session: Session, user_id: int, first: date, last: date) -> dict[str, dict]:
+    """Per-day totals across exercises, same shape as workout_stats.calendar()."""
+    rows = session.exec(
+        select(
+            WorkoutDay.day,
+            func.sum(WorkoutDay.workouts),
+            func.sum(WorkoutDay.sets),
+            func.sum(WorkoutDay.reps),
+            func.sum(WorkoutDay.volume),
+        )
+        .where(WorkoutDay.user_id == user_id, WorkoutDay.day >= first, WorkoutDay.day <= last)
+        .group_by(WorkoutDay.day)
+    ).all()
+    return {
+        d.isoformat(): {"workouts": count, "sets": sets, "reps": reps, "volume": round(volume, 1)}
+        for d, count, sets, reps, volume in rows
+    }
+
+
+def summary(session: Session, user_id: int, first: date, last: date) -> list[dict]:
+    """One entry per day and exercise, oldest first."""
+    rows = session.exec(
+        select(WorkoutDay)
+        .where(WorkoutDay.user_id == user_id, WorkoutDay.day >= first, WorkoutDay.day <= last)
+        .order_by(WorkoutDay.day, WorkoutDay.exercise)
+    ).all()
+    return [
+        {
+            "day": r.day,
+            "exercise": r.exercise,
+            "workouts": r.workouts,
+            "sets": r.sets,
+            "reps": r.reps,
+            "volume": round(r.volume, 1),
+            "max_weight": r.max_weight,
+        }
+        for r in rows
+    ]
+
+
+if __name__ == "__main__":
+    # python -m app.utils.workout_rollup
+    from app.database import engine
+
+    with Session(engine) as session:
+        print(f"{rebuild(session)} rollup rows")
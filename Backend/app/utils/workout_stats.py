@@ -0,0 +1,108 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Date, case, func, literal, type_coerce
+from sqlmodel import Session, select
+
+from app.models.workout_model import Workout
+from app.utils import workout_rollup
+
+# Workout.created_at is naive server-local time (datetime.now()), so a
+# client's calendar day maps to a [start, end) window of stored values.
+
+CALENDAR_MAX_DAYS = 366
+
+
+def day_start(day: date, tz: ZoneInfo | None) -> datetime:
+    """Midnight of `day` in tz, as a stored created_at value. tz=None: server time."""
+    start = datetime.combine(day, time())
+    if tz is None:
+        return start
+    return start.replace(tzinfo=tz).astimezone().replace(tzinfo=None)
+
+
+def _shift_to_date(column, offset: timedelta, dialect: str):
+    if dialect == "sqlite":
+        return func.date(column, f"{int(offset.total_seconds() // 60):+d} minutes")
+    return func.date(column + offset)
+
+
+def local_day(column, first: date, last: date, tz: ZoneInfo | None, dialect: str):
+    """SQL expression: the tz calendar day of a stored timestamp in [first, last].
+
+    Days with the same UTC offset share one `date(created_at + offset)`
+    branch; a day on which the clocks change is labelled directly, so DST
+    never pushes rows into the neighbouring day.
+    """
+    days = [first + timedelta(days=n) for n in range((last - first).days + 2)]
+    starts = [day_start(d, tz) for d in days]
+    offsets = [datetime.combine(d, time()) - s for d, s in zip(days, starts)]
+
+    branches = []  # [window end, offset or None, label day]
+    for i, day in enumerate(days[:-1]):
+        if offsets[i] != offsets[i + 1]:
+            branches.append([starts[i + 1], None, day])
+        elif branches and branches[-1][1] == offsets[i]:
+            branches[-1][0] = starts[i + 1]
+        else:
+            branches.append([starts[i + 1], offsets[i], day])
+
+    return type_coerce(
+        case(*[
+            (
+                column < end,
+                literal(day, Date) if offset is None else _shift_to_date(column, offset, dialect),
+            )
+            for end, offset, day in branches
+        ]),
+        Date,
+    )
+
+
+def _matches_server_days(first: date, last: date, tz: ZoneInfo | None) -> bool:
+    """Whether every day in first..last starts at the same instant in tz and server time."""
+    return all(
+        day_start(d, tz) == datetime.combine(d, time())
+        for d in (first + timedelta(days=n) for n in range((last - first).days + 2))
+    )
+
+
+def calendar(session: Session, user_id: int, first: date, last: date, tz: ZoneInfo | None) -> dict[str, dict]:
+    """Per-day totals for first..last (inclusive).
+
+    When the client's days are the server's days this is a read of the
+    daily rollup; otherwise one grouped range scan of the window's rows
+    through ix_workout_user_created.
+    """
+    if _matches_server_days(first, last, tz):
+        return workout_rollup.days(session, user_id, first, last)
+
+    dialect = session.get_bind().dialect.name
+    day = local_day(Workout.created_at, first, last, tz, dialect).label("day")
+    reps = Workout.sets * Workout.reps
+
+    rows = session.exec(
+        select(
+            day,
+            func.count(Workout.id),
+            func.sum(Workout.sets),
+            func.sum(reps),
+            func.sum(reps * func.coalesce(Workout.weight, 0)),
+        )
+        .where(
+            Workout.user_id == user_id,
+            Workout.created_at >= day_start(first, tz),
+            Workout.created_at < day_start(last + timedelta(days=1), tz),
+        )
+        .group_by(day)
+    ).all()
+
+    return {
+        d.isoformat(): {
+            "workouts": count,
+            "sets": sets,
+            "reps": total_reps,
+            "volume": round(volume, 1),
+        }
+        for d, count, sets, total_reps, volume in rows
+    }
@@ -0,0 +1,119 @@
+"""Workout analytics for a heavy logger: NumPy columns vs a per-row Python loop.
+
+Run from Backend/:  python -m benchmarks.analytics [sets]
+
+Seeds one synthetic user with `sets` workout rows (default 100k, about
+four years of daily training over a dozen exercises) in a throwaway
+SQLite file, so healthbook.db is never touched. The loop version is the
+straightforward dict-per-row way to get the same weekly volume and best
+estimated 1RM per exercise; both must agree.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, select
+
+from app.database import create_db_engine
+from app.models.user_model import User
+from app.models.post_model import Post  # noqa: F401  (resolves User.posts)
+from app.models.workout_model import Workout
+from app.utils import workout_analytics
+
+EXERCISES = [
+    "squat", "bench", "deadlift", "press", "row", "pullup",
+    "dip", "curl", "lunge", "rdl", "incline", "pushup",
+]
+
+
+def seed(engine, n_sets: int) -> int:
+    rng = np.random.default_rng(7)
+    start = datetime(2021, 1, 1, 6)
+    # ~70 sets a day -> 100k sets span roughly four years
+    minutes = np.sort(rng.integers(0, n_sets // 70 * 24 * 60, n_sets))
+    exercise = rng.integers(0, len(EXERCISES), n_sets)
+    reps = rng.integers(1, 13, n_sets)
+    weight = np.round(40 + exercise * 5 + minutes / minutes.max() * 60 + rng.normal(0, 5, n_sets), 1)
+    weightless = np.isin(exercise, [EXERCISES.index("pullup"), EXERCISES.index("pushup")])
+
+    with Session(engine) as session:
+        user = User(username="heavy", email="heavy@bench.io", password_hash="x",
+                    gender="x", height=180, weight=80, age=30, bmi=24.7)
+        session.add(user)
+        session.commit()
+        session.execute(insert(Workout), [
+            {
+                "user_id": user.id,
+                "exercise": EXERCISES[e],
+                "sets": 1,
+                "reps": int(r),
+                "weight": None if no_weight else float(w),
+                "created_at": start + timedelta(minutes=int(m)),
+            }
+            for e, r, w, no_weight, m in zip(exercise, reps, weight, weightless, minutes)
+        ])
+        session.commit()
+        return user.id
+
+
+def loop_version(session: Session, user_id: int) -> tuple[dict, dict]:
+    """Weekly volume and best e1RM per exercise, one Python iteration per row."""
+    weekly: dict = {}
+    best: dict = {}
+    for exercise, sets, reps, weight, created_at in session.exec(
+        select(Workout.exercise, Workout.sets, Workout.reps, Workout.weight, Workout.created_at)
+        .where(Workout.user_id == user_id)
+        .order_by(Workout.created_at, Workout.id)
+    ):
+        day = created_at.date()
+        week = day - timedelta(days=day.weekday())
+        weekly[week] = weekly.get(week, 0) + sets * reps * (weight or 0)
+        if weight:
+            e1rm = weight * (1 + reps / 30) if reps > 1 else weight
+            best[exercise] = max(best.get(exercise, 0), e1rm)
+    return weekly, best
+
+
+def timed(fn, *args, repeat: int = 3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main(n_sets: int = 100_000) -> None:
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_db_engine(url)
+    SQLModel.metadata.create_all(engine)
+    user_id = seed(engine, n_sets)
+
+    with Session(engine) as session:
+        cols, load_s = timed(workout_analytics.load_columns, session, user_id)
+        result, compute_s = timed(workout_analytics.compute, cols)
+        (weekly, best), loop_s = timed(loop_version, session, user_id)
+        workout_analytics.for_user(session, user_id)
+        _, cached_s = timed(workout_analytics.for_user, session, user_id)
+
+    # same answers
+    volume = dict(zip(result["weekly_volume"]["week"], result["weekly_volume"]["volume"]))
+    assert all(abs(volume[str(week)] - v) < 0.5 for week, v in weekly.items())
+    for entry in result["exercises"]:
+        if entry["best_e1rm"] is not None:
+            assert abs(entry["best_e1rm"] - best[entry["exercise"]]) < 0.1
+
+    weeks = len(result["weekly_volume"]["week"])
+    print(f"{n_sets} sets, {len(result['exercises'])} exercises, {weeks} weeks")
+    print(f"load into arrays     {load_s * 1e3:8.1f} ms")
+    print(f"numpy analytics      {compute_s * 1e3:8.1f} ms   (1RM series, PRs, rolling, weekly volume)")
+    print(f"per-row python loop  {loop_s * 1e3:8.1f} ms   (load + weekly volume and best 1RM only)")
+    print(f"cached, same user    {cached_s * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,61 @@
+"""Per-request cost of get_current_user, with and without the principal cache.
+
+Run from Backend/:  python -m benchmarks.auth_overhead [users] [requests]
+
+Uses a throwaway SQLite file so healthbook.db is never touched.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import create_async_db_engine
+from app.models.user_model import User
+from app.models.post_model import Post  # noqa: F401  (resolves User.posts)
+from app.utils import auth_utils
+
+
+def main(n_users: int = 5000, n_requests: int = 5000) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all(
+            User(username=f"u{i}", email=f"u{i}@bench.io", password_hash="x",
+                 gender="x", height=180, weight=80, age=30, bmi=24.7)
+            for i in range(n_users)
+        )
+        session.commit()
+
+    tokens = [auth_utils.create_access_token(f"u{i % n_users}@bench.io") for i in range(n_requests)]
+    # a realistic mix: each client sends its token many times
+    hot_tokens = tokens[:100] * (n_requests // 100)
+
+    async_engine = create_async_db_engine(f"sqlite:///{path}")
+
+    async def run(label: str, use_cache: bool) -> None:
+        auth_utils.principal_cache.clear()
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            start = time.perf_counter()
+            for token in hot_tokens:
+                if not use_cache:
+                    auth_utils.principal_cache.clear()
+                await auth_utils.get_current_user(token=token, session=session)
+                session.expunge_all()
+            elapsed = time.perf_counter() - start
+        per_request = elapsed / len(hot_tokens) * 1e6
+        print(f"{label:<22} {per_request:8.1f} µs/request")
+
+    print(f"{n_users} users, {len(hot_tokens)} authenticated requests")
+    asyncio.run(run("no principal cache", use_cache=False))
+    asyncio.run(run("principal cache", use_cache=True))
+    print(auth_utils.principal_cache.stats())
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
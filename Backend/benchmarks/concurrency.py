@@ -0,0 +1,116 @@
+"""Feed throughput under many concurrent clients: sync Session vs AsyncSession.
+
+Run from Backend/:  python -m benchmarks.concurrency [concurrency] [requests]
+
+Both handlers run the same feed query against a throwaway SQLite file
+(so healthbook.db is never touched). The sync one is the old shape - a
+`def` route with a Session, so every request holds one of AnyIO's worker
+threads for its whole DB round trip; the async one is what the routers
+use now.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlmodel import SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import create_async_db_engine, create_db_engine
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.routes.post_routes import FEED_PAGE_SIZE, _post_rows_query, _serialize_post
+
+
+def build_app(url: str) -> FastAPI:
+    engine = create_db_engine(url)
+    async_engine = create_async_db_engine(url)
+
+    def get_session():
+        with Session(engine) as session:
+            yield session
+
+    async def get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app = FastAPI()
+
+    @app.get("/sync/feed")
+    def sync_feed(session: Session = Depends(get_session)):
+        rows = session.exec(_post_rows_query().limit(FEED_PAGE_SIZE)).all()
+        return [_serialize_post(*row) for row in rows]
+
+    @app.get("/async/feed")
+    async def async_feed(session: AsyncSession = Depends(get_async_session)):
+        rows = (await session.exec(_post_rows_query().limit(FEED_PAGE_SIZE))).all()
+        return [_serialize_post(*row) for row in rows]
+
+    return app
+
+
+def seed(url: str, n_users: int = 200, n_posts: int = 20000) -> None:
+    engine = create_db_engine(url)
+    SQLModel.metadata.create_all(engine)
+    start = datetime.utcnow() - timedelta(days=30)
+    with Session(engine) as session:
+        session.add_all(
+            User(username=f"u{i}", email=f"u{i}@bench.io", password_hash="x",
+                 gender="x", height=180, weight=80, age=30, bmi=24.7)
+            for i in range(n_users)
+        )
+        session.commit()
+        session.add_all(
+            Post(content=f"post {i}", user_id=i % n_users + 1, created_at=start + timedelta(minutes=i))
+            for i in range(n_posts)
+        )
+        session.commit()
+    engine.dispose()
+
+
+async def load(app: FastAPI, path: str, concurrency: int, n_requests: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        async with slots:
+            t0 = time.perf_counter()
+            r = await client.get(path)
+            latencies.append(time.perf_counter() - t0)
+            if r.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)  # warm the pool
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(n_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{path:<12} {n_requests / elapsed:8.0f} req/s"
+        f"   p50 {statistics.median(latencies) * 1e3:7.1f} ms"
+        f"   p99 {p99 * 1e3:7.1f} ms   errors {errors}"
+    )
+
+
+def main(concurrency: int = 500, n_requests: int = 5000) -> None:
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    seed(url)
+    app = build_app(url)
+    print(f"{concurrency} concurrent clients, {n_requests} feed requests each run")
+    asyncio.run(load(app, "/sync/feed", concurrency, n_requests))
+    asyncio.run(load(app, "/async/feed", concurrency, n_requests))
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
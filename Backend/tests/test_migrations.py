@@ -0,0 +1,90 @@
+"""Upgrading the committed baseline database (healthbook.db) to the current schema.
+
+Run from Backend/:  python -m pytest tests
+"""
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+from sqlmodel import SQLModel, Session, select
+
+from app.database import add_missing_columns, add_missing_indexes, create_db_engine, index_names
+from app.models.friendship_model import Friendship
+from app.models.migration_model import SchemaMigration
+from app.models.timeline_model import TimelineEntry
+from app.models.user_model import User
+from app.utils.counters import reconcile_counters
+from app.utils.migrations import MIGRATIONS, run_migrations
+
+BASELINE_DB = Path(__file__).resolve().parents[1] / "healthbook.db"
+
+
+def _add_user(db: sqlite3.Connection, username: str) -> int:
+    cursor = db.execute(
+        "INSERT INTO user (username, email, password_hash, gender, height, weight, age, bmi)"
+        " VALUES (?, ?, 'x', 'x', 180, 80, 30, 24.7)",
+        (username, f"{username}@upgrade.test"),
+    )
+    return cursor.lastrowid
+
+
+def _upgrade(engine) -> None:
+    """The schema part of main.on_startup."""
+    SQLModel.metadata.create_all(engine)
+    if add_missing_columns(engine):
+        with Session(engine) as session:
+            reconcile_counters(session)
+    run_migrations(engine)
+    add_missing_indexes(engine)
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """A copy of the baseline database plus two users with a duplicated friendship."""
+    path = tmp_path / "healthbook.db"
+    shutil.copyfile(BASELINE_DB, path)
+    db = sqlite3.connect(path)
+    a, b = _add_user(db, "upgrade_a"), _add_user(db, "upgrade_b")
+    # the same pair twice, once from each side
+    db.execute("INSERT INTO friendship (requester_id, receiver_id, status) VALUES (?, ?, 'pending')", (a, b))
+    db.execute("INSERT INTO friendship (requester_id, receiver_id, status) VALUES (?, ?, 'accepted')", (b, a))
+    db.execute("INSERT INTO post (content, user_id, created_at) VALUES ('hello', ?, '2025-01-01 08:00:00')", (b,))
+    db.commit()
+    db.close()
+
+    engine = create_db_engine(f"sqlite:///{path}")
+    yield engine, a, b
+    engine.dispose()
+
+
+def test_upgrade_dedupes_friendships_before_the_pair_index(baseline):
+    engine, a, b = baseline
+    _upgrade(engine)
+
+    with Session(engine) as session:
+        rows = session.exec(select(Friendship)).all()
+        assert [(f.requester_id, f.receiver_id, f.status) for f in rows] == [(b, a, "accepted")]
+        assert session.get(User, a).friends_count == 1
+        assert session.get(User, b).friends_count == 1
+        applied = set(session.exec(select(SchemaMigration.name)).all())
+    assert applied == {name for name, _ in MIGRATIONS}
+    with engine.connect() as conn:
+        assert "uq_friendship_pair" in index_names(conn, "friendship")
+
+
+def test_upgrade_backfills_timelines(baseline):
+    engine, a, b = baseline
+    _upgrade(engine)
+
+    with Session(engine) as session:
+        owners = session.exec(select(TimelineEntry.owner_id).order_by(TimelineEntry.owner_id)).all()
+    # the author's own inbox and their (deduplicated) friend's; the
+    # baseline user's post sits in their own inbox
+    assert owners.count(a) == 1 and owners.count(b) == 1
+
+
+def test_upgrade_is_repeatable(baseline):
+    engine, _, _ = baseline
+    _upgrade(engine)
+    _upgrade(engine)
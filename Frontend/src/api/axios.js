@@ -1,6 +1,9 @@
 import axios from "axios";
 
 const BASE_URL = "http://127.0.0.1:8000";
+// after a write the API hands back a short-lived token; sending it on the
+// next requests makes them read from the primary (read-your-writes)
+const REPLICA_PIN_HEADER = "X-Replica-Pin";
 
 const api = axios.create({
   baseURL: BASE_URL,
@@ -14,4 +17,27 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+const attachReplicaPin = (instance) => {
+  instance.interceptors.request.use((config) => {
+    const pin = sessionStorage.getItem("replica_pin");
+    if (pin) {
+      config.headers[REPLICA_PIN_HEADER] = pin;
+    }
+    return config;
+  });
+
+  instance.interceptors.response.use((response) => {
+    const pin = response.headers[REPLICA_PIN_HEADER.toLowerCase()];
+    if (pin) {
+      sessionStorage.setItem("replica_pin", pin);
+    }
+    return response;
+  });
+};
+
+// the pages call the default axios instance directly (main.jsx imports
+// this module once so the interceptors are in place before any request)
+attachReplicaPin(axios);
+attachReplicaPin(api);
+
 export default api;
@@ -7,11 +7,12 @@ const PostCard = ({ post }) => {
   const nav = useNavigate();
   const { user, token } = useContext(AuthContext);
 
-  const [likedPost, setLikedPost] = useState(false);
+  const [likedPost, setLikedPost] = useState(post.liked_by_me || false);
   const [likesCount, setLikesCount] = useState(post.likes_count || 0);
 
   const [showComments, setShowComments] = useState(false);
   const [comments, setComments] = useState([]);
+  const [commentsCursor, setCommentsCursor] = useState(null);
   const [commentInput, setCommentInput] = useState("");
 
   const username = post.user || post.username || "User";
@@ -23,6 +24,9 @@ const PostCard = ({ post }) => {
     );
 
   useEffect(() => {
+    // feed pages already carry liked_by_me; only ask when it's missing
+    if (post.liked_by_me !== undefined) return;
+
     const load = async () => {
       try {
         const res = await axios.get(
@@ -35,7 +39,7 @@ const PostCard = ({ post }) => {
       }
     };
     load();
-  }, [post.id, token]);
+  }, [post.id, post.liked_by_me, token]);
 
   const toggleLike = async () => {
     try {
@@ -60,13 +64,19 @@ const PostCard = ({ post }) => {
     }
   };
 
-  const loadComments = async () => {
+  const loadComments = async (after = null) => {
     try {
       const res = await axios.get(
         `http://localhost:8000/posts/${post.id}/comments`,
-        { headers: { Authorization: `Bearer ${token}` } }
+        {
+          params: after ? { after } : {},
+          headers: { Authorization: `Bearer ${token}` },
+        }
+      );
+      setComments((prev) =>
+        after ? [...prev, ...res.data.comments] : res.data.comments
       );
-      setComments(res.data);
+      setCommentsCursor(res.data.next_cursor);
     } catch (err) {
       console.log(err);
     }
@@ -153,6 +163,9 @@ const PostCard = ({ post }) => {
       </div>
 
       {/* MEDIA */}
+      {post.media_status === "processing" && (
+        <p className="text-xs text-gray-400 mb-5">Uploading media…</p>
+      )}
       {post.image_url && (
         <div className="w-full rounded-2xl mb-5 overflow-hidden shadow-md bg-black border border-gray-700/50">
           {isVideo ? (
@@ -207,7 +220,7 @@ const PostCard = ({ post }) => {
               >
                 <div>
                   <p className="text-xs text-teal-400 font-bold mb-1">
-                    {c.user_id === user.id ? "You" : "User"}
+                    {c.user_id === user.id ? "You" : c.username || "User"}
                   </p>
                   <p className="text-gray-300 text-sm">{c.content}</p>
 
@@ -231,6 +244,15 @@ const PostCard = ({ post }) => {
                 )}
               </div>
             ))}
+
+            {commentsCursor && (
+              <button
+                onClick={() => loadComments(commentsCursor)}
+                className="w-full text-xs text-gray-400 hover:text-teal-400 py-1"
+              >
+                Load more comments
+              </button>
+            )}
           </div>
 
           <div className="flex gap-2">
@@ -1,4 +1,29 @@
+import { useEffect, useState } from "react";
+import axios from "axios";
+
+const WEEKLY_GOAL = 5;
+
+const toDateKey = (d) =>
+  `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
+
 const StatsCard = () => {
+  const [workoutDays, setWorkoutDays] = useState(0);
+
+  // days with at least one workout since Monday (read from the daily rollup)
+  useEffect(() => {
+    const monday = new Date();
+    monday.setDate(monday.getDate() - ((monday.getDay() + 6) % 7));
+
+    axios
+      .get("http://localhost:8000/workouts/summary", {
+        params: { from: toDateKey(monday), to: toDateKey(new Date()) },
+      })
+      .then((res) => setWorkoutDays(new Set(res.data.map((r) => r.day)).size))
+      .catch((err) => console.log("Stats load error:", err));
+  }, []);
+
+  const goalPercent = Math.min(100, Math.round((workoutDays / WEEKLY_GOAL) * 100));
+
   return (
     <div className="bg-gray-800/50 backdrop-blur-sm rounded-3xl p-6 border border-gray-700/50 shadow-xl sticky top-24">
       <h3 className="text-white font-bold text-xl mb-6 flex items-center gap-2">
@@ -24,10 +49,13 @@ const StatsCard = () => {
         <div>
           <div className="flex justify-between text-xs mb-2">
             <span className="text-gray-400 font-semibold">Workouts</span>
-            <span className="text-white font-bold">4/5</span>
+            <span className="text-white font-bold">{workoutDays}/{WEEKLY_GOAL}</span>
           </div>
           <div className="h-2.5 w-full bg-gray-900 rounded-full overflow-hidden border border-gray-700/50">
-            <div className="h-full bg-gradient-to-r from-teal-600 to-green-400 w-[80%] shadow-[0_0_10px_rgba(45,212,191,0.5)]"></div>
+            <div
+              className="h-full bg-gradient-to-r from-teal-600 to-green-400 shadow-[0_0_10px_rgba(45,212,191,0.5)]"
+              style={{ width: `${goalPercent}%` }}
+            ></div>
           </div>
         </div>
 
@@ -17,9 +17,11 @@ const Dashboard = () => {
     setLoading(true);
 
     try {
-      const res = await axios.get("http://localhost:8000/posts/feed");
+      const res = await axios.get("http://localhost:8000/posts/feed", {
+        params: { include_liked: true },
+      });
 
-      const formatted = res.data.map((p) => ({
+      const formatted = res.data.posts.map((p) => ({
         id: p.id,
         content: p.content,
         user: p.user,
@@ -28,7 +30,9 @@ const Dashboard = () => {
         likes_count: p.likes_count || 0,
         comments_count: p.comments_count || 0,
         image_url: p.image_url || null,
+        media_status: p.media_status || null,
         avatar_url: p.avatar_url || null,
+        liked_by_me: p.liked_by_me,
       }));
 
       setPosts(formatted);
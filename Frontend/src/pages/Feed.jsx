@@ -6,11 +6,16 @@ import PostCardPinterest from "../components/PostCardPinterest";
 const Feed = () => {
   const [posts, setPosts] = useState([]);
   const [activePost, setActivePost] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [mode, setMode] = useState("all");
 
-  const loadFeed = async () => {
+  const loadFeed = async (before = null) => {
     try {
-      const res = await axios.get("http://localhost:8000/posts/feed");
-      setPosts(res.data);
+      const res = await axios.get("http://localhost:8000/posts/feed", {
+        params: before ? { before, mode } : { mode },
+      });
+      setPosts((prev) => (before ? [...prev, ...res.data.posts] : res.data.posts));
+      setNextCursor(res.data.next_cursor);
     } catch (err) {
       console.log("Feed load error:", err);
     }
@@ -18,12 +23,27 @@ const Feed = () => {
 
   useEffect(() => {
     loadFeed();
-  }, []);
+  }, [mode]);
 
   return (
     <div className="min-h-screen bg-gray-950 text-white">
       <Navbar />
 
+      {/* ALL / FOLLOWING */}
+      <div className="max-w-7xl mx-auto px-4 pt-4 flex gap-2">
+        {["all", "following"].map((m) => (
+          <button
+            key={m}
+            onClick={() => setMode(m)}
+            className={`px-4 py-2 rounded-xl font-bold capitalize transition-all ${
+              mode === m ? "bg-teal-500 text-black" : "bg-gray-800 hover:bg-gray-700 text-white"
+            }`}
+          >
+            {m}
+          </button>
+        ))}
+      </div>
+
       {/* GRID */}
       <div className="max-w-7xl mx-auto p-4 columns-1 sm:columns-2 md:columns-3 lg:columns-4 gap-6 space-y-6">
         {posts.map((post) => (
@@ -35,6 +55,17 @@ const Feed = () => {
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="max-w-7xl mx-auto px-4 pb-8">
+          <button
+            onClick={() => loadFeed(nextCursor)}
+            className="w-full bg-gray-800 hover:bg-gray-700 text-white py-3 rounded-xl font-bold transition-all active:scale-95"
+          >
+            Load more
+          </button>
+        </div>
+      )}
+
       {/* MODAL with Glassmorphism */}
       {activePost && (
         <div className="fixed inset-0 bg-black/60 backdrop-blur-sm flex items-center justify-center z-50 transition-opacity duration-300">
@@ -244,6 +244,11 @@ const Friends = () => {
                       <p className="font-semibold text-white">
                         {s.username}
                       </p>
+                      {s.mutual_friends > 0 && (
+                        <p className="text-xs text-gray-400">
+                          {s.mutual_friends} mutual friend{s.mutual_friends === 1 ? "" : "s"}
+                        </p>
+                      )}
                       {s.bmi && (
                         <p className="text-xs text-teal-400">
                           BMI: {s.bmi}
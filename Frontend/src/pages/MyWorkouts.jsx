@@ -4,6 +4,8 @@ import Navbar from "../components/Navbar";
 import { AuthContext } from "../context/AuthContext";
 
 const WEEKDAYS = ["Su", "Mo", "Tu", "We", "Th", "Fr", "Sa"];
+const TIMEZONE = Intl.DateTimeFormat().resolvedOptions().timeZone;
+const STREAK_WINDOW_DAYS = 365;
 
 const toDateKey = (dateLike) => {
   const d = new Date(dateLike);
@@ -33,16 +35,23 @@ const MyWorkouts = () => {
     }
   }, [token]);
 
+  const [streakMap, setStreakMap] = useState({});
+
+  // per-day totals for a date range, grouped on the server in our timezone
+  const fetchCalendar = async (from, to) => {
+    const res = await axios.get("http://localhost:8000/workouts/calendar", {
+      params: { from: toDateKey(from), to: toDateKey(to), tz: TIMEZONE },
+    });
+    return res.data || {};
+  };
+
   const loadData = async () => {
     setLoading(true);
     try {
-      const [resWorkouts, resCalendar] = await Promise.all([
-        axios.get("http://localhost:8000/workouts/me"),
-        axios.get("http://localhost:8000/workouts/calendar"),
-      ]);
+      const streakFrom = new Date();
+      streakFrom.setDate(streakFrom.getDate() - STREAK_WINDOW_DAYS);
 
-      setWorkouts(resWorkouts.data);
-      setCalendarMap(resCalendar.data || {});
+      setStreakMap(await fetchCalendar(streakFrom, new Date()));
     } catch (err) {
       console.log("Workout load error:", err);
     } finally {
@@ -54,6 +63,27 @@ const MyWorkouts = () => {
     loadData();
   }, []);
 
+  // the selected day's workouts only (one page covers any realistic day)
+  useEffect(() => {
+    if (!selectedDate) return;
+    axios
+      .get("http://localhost:8000/workouts/me", {
+        params: { from: selectedDate, to: selectedDate, tz: TIMEZONE, limit: 200 },
+      })
+      .then((res) => setWorkouts(res.data.workouts))
+      .catch((err) => console.log("Workout load error:", err));
+  }, [selectedDate]);
+
+  // only the visible month is scanned
+  useEffect(() => {
+    fetchCalendar(
+      new Date(currentYear, currentMonth, 1),
+      new Date(currentYear, currentMonth + 1, 0)
+    )
+      .then(setCalendarMap)
+      .catch((err) => console.log("Calendar load error:", err));
+  }, [currentYear, currentMonth]);
+
   const monthLabel = useMemo(() => {
     const d = new Date(currentYear, currentMonth, 1);
     return d.toLocaleDateString("en-US", {
@@ -99,15 +129,10 @@ const MyWorkouts = () => {
 
   const dayWorkoutCount = useMemo(() => {
     if (!selectedDate) return 0;
-    return calendarMap[selectedDate] || 0;
+    return calendarMap[selectedDate]?.workouts || 0;
   }, [calendarMap, selectedDate]);
 
-  const selectedDayWorkouts = useMemo(() => {
-    if (!selectedDate) return [];
-    return workouts.filter(
-      (w) => toDateKey(w.created_at) === selectedDate
-    );
-  }, [workouts, selectedDate]);
+  const selectedDayWorkouts = selectedDate ? workouts : [];
 
   const streak = useMemo(() => {
     let count = 0;
@@ -115,16 +140,16 @@ const MyWorkouts = () => {
 
     while (true) {
       const key = toDateKey(cursor);
-      if (!calendarMap[key]) break;
+      if (!streakMap[key]) break;
       count += 1;
       cursor.setDate(cursor.getDate() - 1);
     }
     return count;
-  }, [calendarMap]);
+  }, [streakMap]);
 
   const intensityEmojiForDay = (dayNum) => {
     const key = toDateKey(new Date(currentYear, currentMonth, dayNum));
-    const count = key ? calendarMap[key] || 0 : 0;
+    const count = key ? calendarMap[key]?.workouts || 0 : 0;
     if (count >= 3) return "🔥";
     if (count >= 1) return "🔵";
     return "";